@@ -3,14 +3,107 @@ The Gunicorn configuration file
 More information: https://docs.gunicorn.org/en/stable/settings.html
 """
 
-import multiprocessing
+import math
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# cgroup v1 reports "no limit" as a very large number rather than "max"
+CGROUP_V1_UNLIMITED = 2**60
+# resident memory budgeted for each worker process when limiting the number of workers to the container's memory
+WORKER_MEMORY_BYTES = int(os.environ.get("GUNICORN_WORKER_MEMORY_MB", 160)) * 1024 * 1024
+ASGI_WORKER_CLASS = "uvicorn_worker.UvicornWorker"
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> float | None:
+    """The CPU quota of the container's cgroup (v2 or v1) in CPUs, or None if it has none."""
+    cpu_max = _read(root / "cpu.max")
+    if cpu_max is not None:
+        quota, period = cpu_max.split()
+        return None if quota == "max" else int(quota) / int(period)
+
+    quota, period = _read(root / "cpu" / "cpu.cfs_quota_us"), _read(root / "cpu" / "cpu.cfs_period_us")
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def cgroup_memory_limit(root: Path = CGROUP_ROOT) -> int | None:
+    """The memory limit of the container's cgroup (v2 or v1) in bytes, or None if it has none."""
+    memory_max = _read(root / "memory.max")
+    if memory_max is not None:
+        return None if memory_max == "max" else int(memory_max)
+
+    limit = _read(root / "memory" / "memory.limit_in_bytes")
+    if limit is None or int(limit) >= CGROUP_V1_UNLIMITED:
+        return None
+    return int(limit)
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """The CPUs this process may use: the cgroup quota when there is one, otherwise the CPUs it can be scheduled on."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = cgroup_cpu_limit(root)
+    return min(quota, cpus) if quota else cpus
+
+
+def topology(cpus: float, memory: int | None, asgi: bool = False) -> tuple[str, int, int]:
+    """
+    The worker class, number of worker processes and threads per worker for the CPUs and memory available.
+
+    Requests mostly wait on the database, so the aim is about two concurrent requests per CPU, plus one. With at least
+    two CPUs and memory for a process per request, sync workers are used. Otherwise, e.g. a fractional CPU quota or a
+    small memory limit, fewer gthread workers share the concurrency as threads rather than processes that would
+    contend for the same CPU and memory.
+
+    For ASGI, one uvicorn worker per CPU: each event loop serves many concurrent clients.
+    """
+    concurrency = max(2, int(cpus * 2) + 1)
+    by_memory = max(1, int(memory * 0.8) // WORKER_MEMORY_BYTES) if memory else concurrency
+
+    if asgi:
+        return ASGI_WORKER_CLASS, max(1, min(math.ceil(cpus), by_memory)), 1
+
+    if cpus >= 2 and by_memory >= concurrency:
+        return "sync", concurrency, 1
+
+    workers = max(1, min(math.ceil(cpus), by_memory))
+    return "gthread", workers, max(2, math.ceil(concurrency / workers))
+
+
+# serve pems.asgi with uvicorn workers, since the views are async; set GUNICORN_ASGI=false to serve pems.wsgi, where each
+# request runs the views through async_to_sync
+asgi = os.environ.get("GUNICORN_ASGI", "true").lower() == "true"
+wsgi_app = "pems.asgi:application" if asgi else "pems.wsgi:application"
+
+cpus = available_cpus()
+memory = cgroup_memory_limit()
+worker_class, workers, threads = topology(cpus, memory, asgi)
+
+# explicit settings take precedence over the detected topology
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", worker_class)
+workers = int(os.environ.get("GUNICORN_WORKERS", workers))
+threads = int(os.environ.get("GUNICORN_THREADS", threads))
+
+# each thread may hold a pooled database connection; ASGI workers run many requests' queries at once, so use the
+# settings' default pool size
+if not asgi:
+    os.environ.setdefault("DJANGO_DB_POOL_MAX_SIZE", str(threads))
+
+# restart workers after a number of requests to bound memory growth, with jitter so they don't all restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10))
 
 # the unix socket defined in nginx.conf
 bind = "unix:/caltrans/run/gunicorn.sock"
 
-# Recommend (2 x $num_cores) + 1 as the number of workers to start off with
-workers = multiprocessing.cpu_count() * 2 + 1
-
 # send logs to stdout and stderr
 accesslog = "-"
 errorlog = "-"
@@ -18,3 +111,11 @@ errorlog = "-"
 # Preloading can save some RAM resources as well as speed up server boot times,
 # at the cost of not being able to reload app code by restarting workers
 preload_app = True
+
+
+def on_starting(server):
+    memory_mb = f"{memory // (1024 * 1024)} MB" if memory else "unlimited"
+    server.log.info(
+        f"Topology: {workers} {worker_class} worker(s) x {threads} thread(s) "
+        f"for {cpus:g} CPU(s) and {memory_mb} memory, max_requests={max_requests} (+{max_requests_jitter})"
+    )
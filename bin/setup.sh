@@ -7,7 +7,8 @@ if [[ $should_reset == "true" ]]; then
     # running in a devcontainer, reset the DB
     python manage.py ensure_db --reset
 else
-    python manage.py ensure_db
+    # skip provisioning when the databases are already in place
+    python manage.py ensure_db --check || python manage.py ensure_db
 fi
 
 # Load data fixtures (if any)
@@ -18,3 +19,10 @@ if [[ -n "$valid_fixtures" ]]; then
 else
     echo "No JSON fixtures to load"
 fi
+
+# Load station metadata (if any)
+if [[ -n "$DJANGO_DB_STATIONS" ]]; then
+    python manage.py load_stations $DJANGO_DB_STATIONS
+else
+    echo "No station metadata to load"
+fi
@@ -11,4 +11,5 @@ nginx
 
 # start the application server
 
-python -m gunicorn -c $GUNICORN_CONF pems.wsgi
+# the application, pems.wsgi or pems.asgi, is chosen in the config
+python -m gunicorn -c $GUNICORN_CONF
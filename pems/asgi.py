@@ -0,0 +1,21 @@
+"""
+ASGI config for pems project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pems.settings")
+
+application = get_asgi_application()
+
+# imported once the settings are configured, since the module reads them on import
+from pems.core.warmup import warm_if_enabled  # noqa: E402
+
+warm_if_enabled()
@@ -0,0 +1,34 @@
+"""
+The core application: caching of rendered pages.
+"""
+
+from django.conf import settings
+from django.views.decorators.cache import cache_page
+
+from pems import __version__
+
+
+class CachedPageMixin:
+    """
+    Caches the view's rendered response for settings.PAGE_CACHE_SECONDS, under a key that includes the PeMS version
+    and get_cache_version(), so a deploy or a change to the page's data is never served from a stale entry.
+    """
+
+    def get_cache_version(self) -> str:
+        return ""
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = settings.PAGE_CACHE_SECONDS
+        if not timeout:
+            return super().dispatch(request, *args, **kwargs)
+
+        view = super().dispatch
+        if self.view_is_async:
+            # cache_page only awaits the view if it is a coroutine function
+            dispatch = view
+
+            async def view(request, *args, **kwargs):
+                return await dispatch(request, *args, **kwargs)
+
+        key_prefix = f"{__version__}:{self.get_cache_version()}"
+        return cache_page(timeout, key_prefix=key_prefix)(view)(request, *args, **kwargs)
@@ -2,17 +2,40 @@
 The core application: context processors for enriching request context data.
 """
 
-from pems import __version__
+from types import MappingProxyType
+
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from pems import __version__
+
+# context that doesn't depend on the request is computed once, rather than for every template rendered;
+# read-only since the same mappings are shared by every render
+_PEMS_VERSION = MappingProxyType({"pems_version": __version__})
+
+
+def _streamlit_context():
+    return MappingProxyType({"streamlit": MappingProxyType({"url": settings.STREAMLIT_URL})})
+
+
+_STREAMLIT = _streamlit_context()
+
+
+@receiver(setting_changed)
+def _update_context(setting, **kwargs):
+    global _STREAMLIT
+    if setting == "STREAMLIT_URL":
+        _STREAMLIT = _streamlit_context()
 
 
 def pems_version(request):
     """Context processor adds information about the PeMS application's version."""
 
-    return {"pems_version": __version__}
+    return _PEMS_VERSION
 
 
 def streamlit(request):
     """Context processor adds Streamlit-related information."""
 
-    return {"streamlit": {"url": settings.STREAMLIT_URL}}
+    return _STREAMLIT
@@ -0,0 +1,19 @@
+"""
+The core application: database connection pool monitoring.
+"""
+
+from django.db import connections
+
+
+def pool_stats() -> dict[str, dict[str, int]]:
+    """
+    Statistics for the connection pool of each pooled database in this process, by alias.
+    See https://www.psycopg.org/psycopg3/docs/advanced/pool.html#pool-stats for their meaning.
+    """
+    stats = {}
+    for connection in connections.all():
+        # only the postgresql backend has a pool, which is None unless OPTIONS["pool"] is set
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            stats[connection.alias] = pool.get_stats()
+    return stats
@@ -0,0 +1,78 @@
+"""
+The core application: readiness checks of the services a request depends on.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+READINESS_CACHE_KEY = "pems:core:readiness"
+
+
+def check_database(alias: str = "default"):
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+def check_cache(alias: str = "default"):
+    cache = caches[alias]
+    cache.set(READINESS_CACHE_KEY, 1, timeout=60)
+    if cache.get(READINESS_CACHE_KEY) != 1:
+        raise RuntimeError("cache did not return the value set")
+
+
+CHECKS = {"database": check_database, "cache": check_cache}
+
+
+class Readiness:
+    """
+    Runs every check at most once per ttl seconds and reuses the result in between, so frequent probes don't add load
+    to the database and a single slow query doesn't flip the result back and forth. Only the first probe waits for the
+    checks: once there is a result, probes answer with it while a single thread refreshes it.
+    """
+
+    def __init__(self, checks=CHECKS):
+        self.checks = checks
+        self._lock = threading.Lock()
+        # (expires, ready, results)
+        self._result = None
+
+    def status(self) -> tuple[bool, dict[str, str]]:
+        """Whether every check passed, and each check's result: "ok" or the error's class name."""
+        result = self._result
+        if result is None:
+            with self._lock:
+                # another thread may have run the checks while this one waited
+                result = self._result
+                if result is None:
+                    result = self._result = self._run()
+        elif result[0] <= time.monotonic() and self._lock.acquire(blocking=False):
+            # one thread refreshes an expired result, while the others answer with the previous one rather than wait
+            # on checks that may be slow under load
+            try:
+                result = self._result
+                if result is None or result[0] <= time.monotonic():
+                    result = self._result = self._run()
+            finally:
+                self._lock.release()
+        return result[1], result[2]
+
+    def _run(self):
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                check()
+                results[name] = "ok"
+            except Exception as ex:
+                results[name] = type(ex).__name__
+        ready = all(result == "ok" for result in results.values())
+        return time.monotonic() + settings.READINESS_TTL, ready, results
+
+    def reset(self):
+        self._result = None
+
+
+readiness = Readiness()
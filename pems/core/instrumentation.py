@@ -0,0 +1,144 @@
+"""
+The core application: request timing and database query instrumentation, aggregated per worker process.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+import threading
+import time
+
+from .db import pool_stats
+
+# upper bounds in seconds of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Timings:
+    """The measurements for a single request, with durations in seconds."""
+
+    start: float = field(default_factory=time.perf_counter)
+    total: float = 0.0
+    db_queries: int = 0
+    db: float = 0.0
+    template: float = 0.0
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def __call__(self, execute, sql, params, many, context):
+        """A database execute wrapper, see https://docs.djangoproject.com/en/5.2/topics/db/instrumentation/"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.db_queries += 1
+
+    def time_render(self, render):
+        """Wraps a TemplateResponse's render method to record the time spent rendering."""
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                self.template += time.perf_counter() - start
+
+        return timed_render
+
+    def server_timing(self) -> str:
+        """The measurements as a Server-Timing header value, with durations in milliseconds."""
+        return ", ".join(
+            (
+                f'db;dur={self.db * 1000:.1f};desc="{self.db_queries} queries"',
+                f"tpl;dur={self.template * 1000:.1f}",
+                f"total;dur={self.total * 1000:.1f}",
+            )
+        )
+
+
+@dataclass
+class ViewMetrics:
+    """Totals for every request to one view, method and status."""
+
+    requests: int = 0
+    duration: float = 0.0
+    db_queries: int = 0
+    db: float = 0.0
+    template: float = 0.0
+    # cumulative counts of requests no longer than each of DURATION_BUCKETS
+    buckets: list[int] = field(default_factory=lambda: [0] * len(DURATION_BUCKETS))
+
+
+class Metrics:
+    """Request metrics for this worker process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(ViewMetrics)
+
+    def record(self, view: str, method: str, status: int, timings: Timings):
+        with self._lock:
+            metrics = self._views[(view, method, str(status))]
+            metrics.requests += 1
+            metrics.duration += timings.total
+            metrics.db_queries += timings.db_queries
+            metrics.db += timings.db
+            metrics.template += timings.template
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if timings.total <= bound:
+                    metrics.buckets[i] += 1
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            # copies, so rendering doesn't hold the lock
+            views = [(key, replace(metrics, buckets=list(metrics.buckets))) for key, metrics in self._views.items()]
+        views.sort(key=lambda item: item[0])
+
+        lines = []
+
+        def family(name, kind, description):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(view, method, status, **extra):
+            pairs = {"view": view, "method": method, "status": status, **extra}
+            return ",".join(f'{name}="{_escape(value)}"' for name, value in pairs.items())
+
+        family("pems_request_duration_seconds", "histogram", "Wall time of requests, by view.")
+        for key, metrics in views:
+            for bound, count in zip(DURATION_BUCKETS, metrics.buckets):
+                lines.append(f"pems_request_duration_seconds_bucket{{{labels(*key, le=bound)}}} {count}")
+            lines.append(f'pems_request_duration_seconds_bucket{{{labels(*key, le="+Inf")}}} {metrics.requests}')
+            lines.append(f"pems_request_duration_seconds_sum{{{labels(*key)}}} {metrics.duration}")
+            lines.append(f"pems_request_duration_seconds_count{{{labels(*key)}}} {metrics.requests}")
+
+        for name, attr, description in (
+            ("pems_db_queries_total", "db_queries", "Database queries executed by requests, by view."),
+            ("pems_db_duration_seconds_total", "db", "Time requests spent executing database queries, by view."),
+            ("pems_template_duration_seconds_total", "template", "Time requests spent rendering templates, by view."),
+        ):
+            family(name, "counter", description)
+            for key, metrics in views:
+                lines.append(f"{name}{{{labels(*key)}}} {getattr(metrics, attr)}")
+
+        stats = pool_stats()
+        for stat in ("pool_size", "pool_available", "requests_waiting"):
+            name = f"pems_db_{stat}"
+            family(name, "gauge", f"The {stat} statistic of the database connection pool.")
+            for alias, values in stats.items():
+                lines.append(f'{name}{{database="{_escape(alias)}"}} {values.get(stat, 0)}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
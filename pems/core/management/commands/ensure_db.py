@@ -1,3 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import cached_property
+import hashlib
 import os
 
 import psycopg
@@ -5,9 +9,18 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
-from django.db import DEFAULT_DB_ALIAS
+from django.db import DEFAULT_DB_ALIAS, ProgrammingError, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
 from psycopg import Connection, sql
 
+# the most aliases provisioned and migrated at once
+MAX_WORKERS = 4
+# table in each database recording the fingerprint of the schema last migrated to
+FINGERPRINT_TABLE = "pems_ensure_db"
+# key of the advisory lock serializing migrations of a database across concurrently starting containers
+MIGRATION_LOCK_ID = 7406130015
+
 
 class Command(BaseCommand):
     help = (
@@ -125,6 +138,26 @@ class Command(BaseCommand):
             return None
         return db_name, db_user, db_password
 
+    def _configs(self) -> list[tuple[str, str, str, str]]:
+        """(db_alias, db_name, db_user, db_password) for each valid PostgreSQL database in settings.DATABASES."""
+        configs = []
+        for db_alias, db_config in settings.DATABASES.items():
+            validated_config = self._validate_config(db_alias, db_config)
+            if validated_config:
+                configs.append((db_alias, *validated_config))
+        return configs
+
+    def _existing(self, cursor: psycopg.Cursor, usernames: list[str], db_names: list[str]) -> tuple[set[str], set[str]]:
+        """The users and the databases that exist, out of those given, found with a single catalog query."""
+        cursor.execute(
+            "SELECT 'user', rolname FROM pg_catalog.pg_roles WHERE rolname = ANY(%s) "
+            "UNION ALL "
+            "SELECT 'database', datname FROM pg_catalog.pg_database WHERE datname = ANY(%s)",
+            [list(usernames), list(db_names)],
+        )
+        rows = cursor.fetchall()
+        return {name for kind, name in rows if kind == "user"}, {name for kind, name in rows if kind == "database"}
+
     def _user_exists(self, cursor: psycopg.Cursor, username: str) -> bool:
         """Checks if a PostgreSQL user exists."""
         cursor.execute("SELECT 1 FROM pg_catalog.pg_roles WHERE rolname = %s", [username])
@@ -177,77 +210,221 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Failed to create database {db_name} for alias {db_alias}: {e}"))
             raise
 
-    def _ensure_schema_permissions(self, db_name: str, db_user_to_grant: str):
+    def _ensure_schema_permissions(self, db_name: str, *db_users_to_grant: str):
         """
-        Grants USAGE and CREATE permissions on the public schema of a newly created database to the specified user.
-        Connects to the target database using admin credentials. Failure is considered critical as it's for a new database.
+        Grants USAGE and CREATE permissions on the public schema of a newly created database to the specified users.
+        Connects to the target database using admin credentials, once for all of the users. Failure is considered
+        critical as it's for a new database.
         """
-        self.stdout.write(f"Ensuring schema permissions for user: {db_user_to_grant} in database: {db_name}")
+        users = ", ".join(db_users_to_grant)
+        self.stdout.write(f"Ensuring schema permissions for user: {users} in database: {db_name}")
         admin_conn = None
         try:
             admin_conn = self._admin_connection(db_name)
             with admin_conn.cursor() as cursor:
-                grant_query = sql.SQL("GRANT USAGE, CREATE ON SCHEMA public TO {user}").format(
-                    user=sql.Identifier(db_user_to_grant)
+                grant_query = sql.SQL("GRANT USAGE, CREATE ON SCHEMA public TO {users}").format(
+                    users=sql.SQL(", ").join(map(sql.Identifier, db_users_to_grant))
                 )
                 cursor.execute(grant_query)
                 self.stdout.write("Schema permissions confirmed")
         except psycopg.Error as e:
             self.stderr.write(
-                self.style.ERROR(
-                    f"Failed to grant schema permissions for user: {db_user_to_grant} in database: {db_name} : {e}"
-                )
+                self.style.ERROR(f"Failed to grant schema permissions for user: {users} in database: {db_name} : {e}")
             )
             raise CommandError(f"Failed to set schema permissions for newly created database: {db_name}.") from e
         finally:
             if admin_conn:
                 admin_conn.close()
 
-    def _ensure_users_and_db(self, admin_conn: Connection):
+    def _ensure_users_and_db(self, admin_conn: Connection) -> dict[str, list[str]]:
+        """
+        Creates the users and databases that don't exist, after checking for all of them in a single query.
+        Returns the users to grant schema permissions to, by newly created database.
+        """
         self.stdout.write(self.style.MIGRATE_HEADING("Checking and creating database users and databases..."))
+        configs = self._configs()
+        created = {}
         cursor = admin_conn.cursor()
         try:
-            for db_alias, db_config in settings.DATABASES.items():
-                validated_config = self._validate_config(db_alias, db_config)
-                if not validated_config:
-                    continue  # Skip this alias if validation failed
-
-                db_name, db_user, db_password = validated_config
-
+            users, databases = self._existing(
+                cursor, [db_user for _, _, db_user, _ in configs], [db_name for _, db_name, _, _ in configs]
+            )
+            for db_alias, db_name, db_user, db_password in configs:
                 # Ensure DB User Exists
-                if not self._user_exists(cursor, db_user):
+                if db_user not in users:
                     self._create_database_user(cursor, admin_conn.info.user, db_alias, db_user, db_password)
+                    users.add(db_user)
                 else:
                     self.stdout.write(f"User found: {db_user}")
 
                 # Ensure Database Exists
-                if not self._database_exists(cursor, db_name):
+                if db_name not in databases:
                     self._create_database(cursor, db_alias, db_name, db_user)  # db_user is the owner
-                    self._ensure_schema_permissions(db_name, db_user)
+                    databases.add(db_name)
+                    created[db_name] = [db_user]
+                elif db_name in created:
+                    # another alias for a database created by this run
+                    if db_user not in created[db_name]:
+                        created[db_name].append(db_user)
                 else:
                     self.stdout.write(f"Database found: {db_name}")
         finally:
             if cursor:
                 cursor.close()
         self.stdout.write("Database and user checks complete.")
+        return created
+
+    def _migrate(self, db_alias: str):
+        try:
+            self.stdout.write(f"For database: {db_alias}")
+            call_command("migrate", database=db_alias, interactive=False)
+            self.stdout.write(self.style.SUCCESS(f"Migrations complete for database: {db_alias}"))
+        except Exception as e:  # Catch more general errors from call_command
+            self.stderr.write(self.style.ERROR(f"Error running migrations for database: {db_alias}: {str(e)}"))
+            # Re-raise as CommandError to potentially stop the whole process if a migration fails
+            raise CommandError(f"Migration failed for {db_alias}.") from e
+
+    @cached_property
+    def _fingerprint(self) -> str:
+        """
+        A hash of every migration in the project, which changes whenever there is a new migration to apply. Computed from
+        the migration files alone, without a database.
+        """
+        graph = MigrationLoader(None, ignore_no_migrations=True).graph
+        names = sorted(f"{app_label}.{name}" for app_label, name in graph.nodes)
+        return hashlib.sha256("\n".join(names).encode()).hexdigest()
+
+    def _stored_fingerprint(self, db_alias: str) -> str | None:
+        try:
+            with connections[db_alias].cursor() as cursor:
+                cursor.execute(f"SELECT fingerprint FROM {FINGERPRINT_TABLE} WHERE alias = %s", [db_alias])
+                row = cursor.fetchone()
+        except ProgrammingError:
+            # the table is created after the first migration
+            return None
+        return row[0] if row else None
+
+    def _store_fingerprint(self, db_alias: str):
+        with connections[db_alias].cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} "
+                "(alias text PRIMARY KEY, fingerprint text NOT NULL, updated_at timestamptz NOT NULL DEFAULT now())"
+            )
+            cursor.execute(
+                f"INSERT INTO {FINGERPRINT_TABLE} (alias, fingerprint) VALUES (%s, %s) "
+                "ON CONFLICT (alias) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, updated_at = now()",
+                [db_alias, self._fingerprint],
+            )
 
-    def _run_migrations(self):
+    @contextmanager
+    def _migration_lock(self, db_alias: str):
+        """
+        Holds a session advisory lock on the alias's database, so only one container migrates it at a time. Containers
+        that waited find the fingerprint up to date and skip migrating.
+        """
+        with connections[db_alias].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [MIGRATION_LOCK_ID])
+        try:
+            yield
+        finally:
+            with connections[db_alias].cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [MIGRATION_LOCK_ID])
+
+    def _provision(self, db_name: str, db_aliases: list[str], db_users_to_grant: list[str]) -> int:
+        """
+        Grants schema permissions on a newly created database, then migrates each of its aliases in turn, unless the
+        alias's stored fingerprint shows it is up to date. Returns the number of aliases migrated.
+        """
+        migrated = 0
+        try:
+            if db_users_to_grant:
+                self._ensure_schema_permissions(db_name, *db_users_to_grant)
+            with self._migration_lock(db_aliases[0]):
+                for db_alias in db_aliases:
+                    if self._stored_fingerprint(db_alias) == self._fingerprint:
+                        self.stdout.write(f"Schema up to date for database: {db_alias}, skipping migrations")
+                        continue
+                    self._migrate(db_alias)
+                    self._store_fingerprint(db_alias)
+                    migrated += 1
+        finally:
+            # connections are per thread, close this thread's rather than leaving them to the garbage collector
+            connections.close_all()
+        return migrated
+
+    def _run_migrations(self, created: dict[str, list[str]] | None = None) -> bool:
+        """
+        Provisions and migrates the databases concurrently. Aliases for the same database are migrated one after another.
+        Returns whether any alias was migrated.
+        """
         self.stdout.write(self.style.MIGRATE_HEADING("Running migrations..."))
-        for db_alias in settings.DATABASES.keys():
-            if settings.DATABASES[db_alias].get("ENGINE") != "django.db.backends.postgresql":
+        created = created or {}
+        databases = {}
+        for db_alias, db_config in settings.DATABASES.items():
+            if db_config.get("ENGINE") != "django.db.backends.postgresql":
                 self.stdout.write(
                     self.style.WARNING(f"Skipping migrations for database: {db_alias}. ENGINE is not PostgreSQL.")
                 )
                 continue
-            try:
-                self.stdout.write(f"For database: {db_alias}")
-                call_command("migrate", database=db_alias, interactive=False)
-                self.stdout.write(self.style.SUCCESS(f"Migrations complete for database: {db_alias}"))
-            except Exception as e:  # Catch more general errors from call_command
-                self.stderr.write(self.style.ERROR(f"Error running migrations for database: {db_alias}: {str(e)}"))
-                # Re-raise as CommandError to potentially stop the whole process if a migration fails
-                raise CommandError(f"Migration failed for {db_alias}.") from e
+            databases.setdefault(db_config.get("NAME"), []).append(db_alias)
+
+        if databases:
+            with ThreadPoolExecutor(max_workers=min(len(databases), MAX_WORKERS)) as executor:
+                futures = [
+                    executor.submit(self._provision, db_name, db_aliases, created.get(db_name, []))
+                    for db_name, db_aliases in databases.items()
+                ]
+            # every database has been attempted, raise the first failure
+            migrated = sum(future.result() for future in futures)
+        else:
+            migrated = 0
         self.stdout.write("All migrations processed.")
+        return migrated > 0
+
+    def _has_unapplied_migrations(self, db_alias: str) -> bool:
+        executor = MigrationExecutor(connections[db_alias])
+        return bool(executor.migration_plan(executor.loader.graph.leaf_nodes()))
+
+    def _superuser_exists(self, username: str) -> bool:
+        return get_user_model().objects.using(DEFAULT_DB_ALIAS).filter(username=username).exists()
+
+    def _check(self, admin_conn: Connection) -> list[str]:
+        """
+        What isn't in place yet: users, databases, migrations and the superuser. Users and databases are checked with a
+        single query, and the rest only once they all exist.
+        """
+        configs = self._configs()
+        with admin_conn.cursor() as cursor:
+            users, databases = self._existing(
+                cursor, [db_user for _, _, db_user, _ in configs], [db_name for _, db_name, _, _ in configs]
+            )
+        missing = [f"User not found: {db_user}" for _, _, db_user, _ in configs if db_user not in users]
+        missing += [f"Database not found: {db_name}" for _, db_name, _, _ in configs if db_name not in databases]
+        if missing:
+            return missing
+
+        missing = [
+            f"Unapplied migrations for database: {db_alias}"
+            for db_alias, _, _, _ in configs
+            if self._has_unapplied_migrations(db_alias)
+        ]
+        username = os.environ.get("DJANGO_SUPERUSER_USERNAME")
+        if not missing and username and not self._superuser_exists(username):
+            missing.append(f"Superuser not found: {username}")
+        return missing
+
+    def _handle_check(self):
+        admin_conn = self._admin_connection()
+        try:
+            missing = self._check(admin_conn)
+        finally:
+            admin_conn.close()
+
+        for message in missing:
+            self.stderr.write(message)
+        if missing:
+            raise CommandError("Databases are not ready, run ensure_db without --check.")
+        self.stdout.write(self.style.SUCCESS("Databases are ready."))
 
     def _ensure_superuser(self):
         self.stdout.write(self.style.MIGRATE_HEADING("Checking for superuser..."))
@@ -256,9 +433,8 @@ class Command(BaseCommand):
         DJANGO_SUPERUSER_PASSWORD = os.environ.get("DJANGO_SUPERUSER_PASSWORD")
 
         if DJANGO_SUPERUSER_USERNAME:
-            User = get_user_model()
             # Check against the default database
-            if User.objects.using(DEFAULT_DB_ALIAS).filter(username=DJANGO_SUPERUSER_USERNAME).exists():
+            if self._superuser_exists(DJANGO_SUPERUSER_USERNAME):
                 self.stdout.write(f"Superuser: {DJANGO_SUPERUSER_USERNAME} already exists in database: {DEFAULT_DB_ALIAS}")
             else:
                 if DJANGO_SUPERUSER_EMAIL and DJANGO_SUPERUSER_PASSWORD:
@@ -283,8 +459,15 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--reset", action="store_true", help="Completely reset the database(s) (DESTRUCTIVE).")
+        parser.add_argument(
+            "--check", action="store_true", help="Only check that everything is in place, failing if anything isn't."
+        )
 
     def handle(self, *args, **options):
+        if options.get("check", False):
+            self._handle_check()
+            return
+
         # database and user setup (requires admin connection)
         admin_conn = None
         reset = options.get("reset", False)
@@ -292,7 +475,7 @@ class Command(BaseCommand):
             admin_conn = self._admin_connection()
             if reset:
                 self._reset(admin_conn)
-            self._ensure_users_and_db(admin_conn)
+            created = self._ensure_users_and_db(admin_conn)
         except Exception as e:
             self.stderr.write(self.style.ERROR(str(e)))
             return
@@ -300,10 +483,10 @@ class Command(BaseCommand):
             if admin_conn and not admin_conn.closed:
                 admin_conn.close()
 
-        # migrations
-        self._run_migrations()
+        # schema permissions and migrations
+        self._run_migrations(created)
 
-        # superuser
+        # superuser, even when the schema is unchanged: an earlier run may have migrated without being able to create it
         self._ensure_superuser()
 
         self.stdout.write(self.style.SUCCESS("ensure_db command finished successfully."))
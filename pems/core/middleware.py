@@ -2,18 +2,117 @@
 The core application: middleware definitions for request/response cycle.
 """
 
-from django.http import HttpResponse
+from contextlib import ExitStack
+import hmac
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+
+from .health import readiness
+from .instrumentation import Timings, metrics
 
 HEALTHCHECK_PATH = "/healthcheck"
+READINESS_PATH = "/healthcheck/ready"
+METRICS_PATH = "/metrics"
+# encoded once, liveness probes only construct the response
+HEALTHY = b"Healthy"
+
+logger = logging.getLogger(__name__)
 
 
 class Healthcheck:
-    """Middleware intercepts and accepts /healthcheck requests."""
+    """
+    Middleware intercepts and accepts /healthcheck requests, and answers /healthcheck/ready requests with the result of
+    the readiness checks. It is first in MIDDLEWARE so probes skip the rest of the request cycle.
+    """
+
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if request.path == HEALTHCHECK_PATH:
-            return HttpResponse("Healthy", content_type="text/plain")
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        path = request.path
+        if path == HEALTHCHECK_PATH:
+            return HttpResponse(HEALTHY, content_type="text/plain")
+        if path == READINESS_PATH:
+            return self.readiness(*readiness.status())
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        path = request.path
+        if path == HEALTHCHECK_PATH:
+            return HttpResponse(HEALTHY, content_type="text/plain")
+        if path == READINESS_PATH:
+            # the checks use the database, which is only accessed synchronously
+            return self.readiness(*await sync_to_async(readiness.status)())
+        return await self.get_response(request)
+
+    def readiness(self, ready, checks):
+        return JsonResponse(checks, status=200 if ready else 503)
+
+
+class Instrumentation:
+    """
+    Middleware records each request's wall time, database queries and time, and template render time. Sends them in a
+    Server-Timing header and a JSON log line, and serves the metrics aggregated by view at /metrics.
+
+    Only used when settings.INSTRUMENTATION is enabled. It is synchronous, so under ASGI Django runs it in a thread.
+    """
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == METRICS_PATH:
+            return self.metrics(request)
+
+        request.timings = timings = Timings()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            response = self.get_response(request)
+        timings.finish()
+
+        # the view name rather than the path, so metrics have one series per view
+        view = request.resolver_match.view_name if request.resolver_match else "unresolved"
+        metrics.record(view, request.method, response.status_code, timings)
+        response["Server-Timing"] = timings.server_timing()
+        logger.info(
+            json.dumps(
+                {
+                    "view": view,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": round(timings.total * 1000, 1),
+                    "db_queries": timings.db_queries,
+                    "db_ms": round(timings.db * 1000, 1),
+                    "template_ms": round(timings.template * 1000, 1),
+                }
+            )
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # TemplateResponses are rendered after the view returns, by the handler
+        response.render = request.timings.time_render(response.render)
+        return response
+
+    def metrics(self, request):
+        token = settings.INSTRUMENTATION_METRICS_TOKEN
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponseForbidden()
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
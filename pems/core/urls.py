@@ -1,9 +1,12 @@
 from django.urls import path
 from django.views.generic import TemplateView
 
+from . import views
+
 app_name = "core"
 
 # /
 urlpatterns = [
     path("", TemplateView.as_view(template_name="core/index.html"), name="index"),
+    path("db/pool", views.db_pool, name="db_pool"),
 ]
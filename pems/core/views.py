@@ -0,0 +1,14 @@
+"""
+The core application: view definitions for operational endpoints.
+"""
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .db import pool_stats
+
+
+@staff_member_required
+def db_pool(request):
+    """Connection pool statistics of the worker process serving the request."""
+    return JsonResponse(pool_stats())
@@ -0,0 +1,52 @@
+"""
+The core application: compiling every template when the application loads, so the first requests don't pay for it.
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+# the template directories of the PeMS apps, and the project's
+TEMPLATE_DIRS = (
+    settings.BASE_DIR / "pems" / "templates",
+    settings.BASE_DIR / "pems" / "core" / "templates",
+    settings.BASE_DIR / "pems" / "districts" / "templates",
+)
+
+
+def template_names(dirs=TEMPLATE_DIRS) -> list[str]:
+    """The names of the HTML templates in the dirs, relative to the dir they are in."""
+    return sorted(path.relative_to(dir).as_posix() for dir in map(Path, dirs) for path in dir.rglob("*.html"))
+
+
+def warm_templates(dirs=TEMPLATE_DIRS, engine: str = "django") -> list[str]:
+    """
+    Loads every template in dirs into the engine's cached loader, and the templates they extend or include by name.
+    Raises the first TemplateSyntaxError or TemplateDoesNotExist, so a broken template fails at startup rather than on a
+    request. Returns the names of the templates loaded.
+    """
+    engine = engines[engine]
+    names = template_names(dirs)
+    loaded = set()
+    while names:
+        name = names.pop()
+        if name in loaded:
+            continue
+        template = engine.get_template(name)
+        loaded.add(name)
+        for node in template.template.nodelist.get_nodes_by_type((ExtendsNode, IncludeNode)):
+            reference = node.parent_name if isinstance(node, ExtendsNode) else node.template
+            # names given by variables are only known when rendering
+            if isinstance(reference.var, str) and not reference.is_var and not reference.filters:
+                names.append(str(reference.var))
+    return sorted(loaded)
+
+
+def warm_if_enabled() -> list[str]:
+    """Warms the templates when settings.WARM_TEMPLATES is set, for the WSGI and ASGI entry points."""
+    if not settings.WARM_TEMPLATES:
+        return []
+    # with gunicorn's preload_app this runs once in the master process, and the workers fork with the templates compiled
+    return warm_templates()
@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import District
+from .models import District, Station
 
 admin.site.register(District)
+admin.site.register(Station)
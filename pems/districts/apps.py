@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class DistrictConfig(AppConfig):
     name = "pems.districts"
+
+    def ready(self):
+        # connect the signal handlers that invalidate the district registry
+        from . import registry  # noqa: F401
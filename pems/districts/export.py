@@ -0,0 +1,105 @@
+"""
+The districts application: streaming encoders for exports of stations, as CSV or Parquet.
+
+Rows are encoded a chunk at a time, so memory stays bounded by the chunk size rather than the number of rows.
+"""
+
+import csv
+import io
+from itertools import islice
+
+# rows fetched from the database cursor, and encoded, at a time
+CHUNK_SIZE = 2000
+
+
+class _Sink(io.RawIOBase):
+    """A write-only stream that keeps what was written only until it is drained, while still reporting its position."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class CsvEncoder:
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, fields: tuple[str, ...]):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(fields)
+
+    def encode(self, rows: list[tuple]) -> bytes:
+        self.writer.writerows(rows)
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def close(self) -> bytes:
+        return self.encode([])
+
+
+class ParquetEncoder:
+    """Writes each chunk of rows as a Parquet row group."""
+
+    content_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, fields: tuple[str, ...], types: dict[str, str]):
+        # imported on first use, rather than adding pyarrow to the memory of every worker process
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(field, types[field]) for field in fields])
+        self.sink = _Sink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema)
+
+    def encode(self, rows: list[tuple]) -> bytes:
+        if rows:
+            columns = zip(*rows)
+            arrays = [self.pa.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+            self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+def stream(encoder, rows, chunk_size: int = CHUNK_SIZE):
+    """The encoded bytes of rows, a chunk at a time."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield encoder.encode(chunk)
+    yield encoder.close()
+
+
+async def astream(encoder, rows, chunk_size: int = CHUNK_SIZE):
+    """The encoded bytes of the asynchronous iterable rows, a chunk at a time."""
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield encoder.encode(chunk)
+            chunk = []
+    if chunk:
+        yield encoder.encode(chunk)
+    yield encoder.close()
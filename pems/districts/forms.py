@@ -0,0 +1,69 @@
+from django import forms
+
+
+class StationQueryForm(forms.Form):
+    """Filters for a district's stations, from the query string. Every filter is optional."""
+
+    # the model lookup each field filters with
+    LOOKUPS = {
+        "freeway": "freeway",
+        "direction": "direction",
+        "type": "type",
+        "min_latitude": "latitude__gte",
+        "max_latitude": "latitude__lte",
+        "min_longitude": "longitude__gte",
+        "max_longitude": "longitude__lte",
+    }
+
+    freeway = forms.IntegerField(required=False)
+    direction = forms.CharField(required=False)
+    type = forms.CharField(required=False)
+    # a bounding box, in degrees
+    min_latitude = forms.FloatField(required=False, min_value=-90, max_value=90)
+    max_latitude = forms.FloatField(required=False, min_value=-90, max_value=90)
+    min_longitude = forms.FloatField(required=False, min_value=-180, max_value=180)
+    max_longitude = forms.FloatField(required=False, min_value=-180, max_value=180)
+
+    # codes are stored in upper case, compared exactly so the indexes apply
+    def clean_direction(self):
+        return self.cleaned_data["direction"].upper()
+
+    def clean_type(self):
+        return self.cleaned_data["type"].upper()
+
+    def filter(self, queryset):
+        """The stations of queryset matching the filters, in id order. The form must be valid."""
+        filters = {
+            lookup: self.cleaned_data[field]
+            for field, lookup in self.LOOKUPS.items()
+            if self.cleaned_data.get(field) not in (None, "")
+        }
+        return queryset.filter(**filters).order_by("id")
+
+
+class StationPageForm(StationQueryForm):
+    """The filters, plus keyset pagination: up to limit stations with an id greater than after."""
+
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    after = forms.IntegerField(required=False)
+    limit = forms.IntegerField(required=False, min_value=1, max_value=MAX_LIMIT)
+
+    def clean_limit(self):
+        return self.cleaned_data["limit"] or self.DEFAULT_LIMIT
+
+    def filter(self, queryset):
+        queryset = super().filter(queryset)
+        if self.cleaned_data.get("after") is not None:
+            queryset = queryset.filter(id__gt=self.cleaned_data["after"])
+        return queryset
+
+
+class StationExportForm(StationQueryForm):
+    """The filters, plus the format of the export."""
+
+    format = forms.ChoiceField(required=False, choices=[("csv", "CSV"), ("parquet", "Parquet")])
+
+    def clean_format(self):
+        return self.cleaned_data["format"] or "csv"
@@ -0,0 +1,176 @@
+import csv
+from itertools import islice
+from pathlib import Path
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from pems.districts.models import District, Station
+
+# e.g. d07_text_meta_2023_12_22.txt
+META_FILE_PATTERN = re.compile(r"^d(?P<district>\d{2})_text_meta_(?P<date>\d{4}_\d{2}_\d{2})\.txt$")
+# rows sent to the database at once
+BATCH_SIZE = 5000
+# the Station fields, in the order rows are parsed and copied
+FIELDS = (
+    "id",
+    "district_id",
+    "freeway",
+    "direction",
+    "county",
+    "city",
+    "state_postmile",
+    "absolute_postmile",
+    "latitude",
+    "longitude",
+    "length",
+    "type",
+    "lanes",
+    "name",
+)
+
+
+def _int(value: str) -> int | None:
+    return int(value) if value else None
+
+
+def _float(value: str) -> float | None:
+    return float(value) if value else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads districts and stations from station metadata files (dNN_text_meta_YYYY_MM_DD.txt), "
+        "inserting new stations and updating changed ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="+",
+            type=Path,
+            help="Metadata files, or directories of them. The newest file per district is loaded.",
+        )
+        parser.add_argument("--district", help="Only load this district.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows sent to the database at once.")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="The database to load into.")
+
+    def _meta_files(self, paths: list[Path]) -> dict[str, Path]:
+        """The newest metadata file for each district number among paths."""
+        newest = {}
+        for path in paths:
+            if path.is_dir():
+                candidates = sorted(path.iterdir())
+            elif path.is_file():
+                candidates = [path]
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+
+            for candidate in candidates:
+                match = META_FILE_PATTERN.match(candidate.name)
+                if not match:
+                    continue
+                number = District.normalize_number(match["district"])
+                if number not in newest or match["date"] > META_FILE_PATTERN.match(newest[number].name)["date"]:
+                    newest[number] = candidate
+        return newest
+
+    def _rows(self, path: Path, district_id: int):
+        """The station rows of a metadata file, as tuples of FIELDS."""
+        with path.open(newline="") as f:
+            for line, row in enumerate(csv.DictReader(f, delimiter="\t"), start=2):
+                try:
+                    yield (
+                        int(row["ID"]),
+                        district_id,
+                        int(row["Fwy"]),
+                        row["Dir"],
+                        _int(row["County"]),
+                        _int(row["City"]),
+                        row["State_PM"] or "",
+                        _float(row["Abs_PM"]),
+                        _float(row["Latitude"]),
+                        _float(row["Longitude"]),
+                        _float(row["Length"]),
+                        row["Type"],
+                        _int(row["Lanes"]) or 0,
+                        row["Name"] or "",
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    raise CommandError(f"Invalid station on line {line} of {path.name}: {e!r}") from e
+
+    def _batches(self, rows, batch_size: int):
+        rows = iter(rows)
+        while batch := list(islice(rows, batch_size)):
+            yield batch
+
+    def _copy(self, database: str, rows, batch_size: int) -> int:
+        """
+        Streams rows into a temporary table with COPY, then upserts them into the station table, a batch at a time.
+        Stations whose columns are all unchanged are not rewritten, keeping their updated_at. Returns the number of
+        stations inserted or updated.
+        """
+        connection = connections[database]
+        quote = connection.ops.quote_name
+        table = quote(Station._meta.db_table)
+        columns = ", ".join(quote(Station._meta.get_field(field).column) for field in FIELDS)
+        updates = [quote(Station._meta.get_field(field).column) for field in FIELDS[1:]]
+        updated_at = quote(Station._meta.get_field("updated_at").column)
+        staging = quote("load_stations")
+
+        changed = 0
+        with connection.cursor() as cursor:
+            # dropped explicitly rather than ON COMMIT: inside an outer transaction, each district's atomic block is only
+            # a savepoint, and the next district would find the table still there
+            cursor.execute(f"CREATE TEMPORARY TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)")
+            for batch in self._batches(rows, batch_size):
+                with cursor.copy(f"COPY {staging} ({columns}) FROM STDIN") as copy:
+                    for row in batch:
+                        copy.write_row(row)
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) "
+                    f"SELECT DISTINCT ON (id) {columns} FROM {staging} ORDER BY id "
+                    "ON CONFLICT (id) DO UPDATE SET "
+                    + ", ".join(f"{column} = EXCLUDED.{column}" for column in updates)
+                    + f", {updated_at} = now()"
+                    + f" WHERE ({', '.join(f'{table}.{column}' for column in updates)})"
+                    + f" IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in updates)})"
+                )
+                changed += cursor.rowcount
+                cursor.execute(f"TRUNCATE {staging}")
+            cursor.execute(f"DROP TABLE {staging}")
+        return changed
+
+    def _bulk_create(self, database: str, rows, batch_size: int) -> int:
+        """Upserts rows with the ORM, for databases other than PostgreSQL. Returns the number of stations written."""
+        written = 0
+        for batch in self._batches(rows, batch_size):
+            Station.objects.using(database).bulk_create(
+                [Station(**dict(zip(FIELDS, row))) for row in batch],
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=(*FIELDS[1:], "updated_at"),
+            )
+            written += len(batch)
+        return written
+
+    def handle(self, *args, **options):
+        database = options["database"]
+        meta_files = self._meta_files(options["paths"])
+        if options["district"] is not None:
+            number = District.normalize_number(options["district"])
+            meta_files = {number: meta_files[number]} if number in meta_files else {}
+        if not meta_files:
+            raise CommandError("No station metadata files found.")
+
+        load = self._copy if connections[database].vendor == "postgresql" else self._bulk_create
+        for number, path in sorted(meta_files.items(), key=lambda item: int(item[0])):
+            with transaction.atomic(using=database):
+                district, created = District.objects.using(database).get_or_create(number=number)
+                if created:
+                    self.stdout.write(f"Created district: {district.number}")
+                written = load(database, self._rows(path, district.id), options["batch_size"])
+            self.stdout.write(f"Loaded {path.name}: {written} stations inserted or updated")
+
+        self.stdout.write(self.style.SUCCESS("load_stations command finished successfully."))
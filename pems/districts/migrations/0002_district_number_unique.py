@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+def normalize_numbers(apps, schema_editor):
+    District = apps.get_model("districts", "District")
+    districts = {}
+    for district in District.objects.order_by("pk"):
+        # the historical model doesn't have District.normalize_number
+        districts.setdefault(district.number.strip().lstrip("0") or "0", []).append(district)
+
+    # numbers that only differ by whitespace or leading zeros would fail the unique constraint part way through
+    conflicts = {number: found for number, found in districts.items() if len(found) > 1}
+    if conflicts:
+        rows = "; ".join(
+            f"{number}: " + ", ".join(f"pk={d.pk} number={d.number!r} name={d.name!r}" for d in found)
+            for number, found in conflicts.items()
+        )
+        raise RuntimeError(f"Districts have the same number once normalized, merge or renumber them first: {rows}")
+
+    for number, (district,) in districts.items():
+        if number != district.number:
+            district.number = number
+            district.save(update_fields=["number"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("districts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_numbers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="district",
+            name="number",
+            field=models.TextField(help_text="The number of the Caltrans district, e.g. 7", unique=True),
+        ),
+    ]
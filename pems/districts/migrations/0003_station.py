@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("districts", "0002_district_number_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Station",
+            fields=[
+                ("id", models.IntegerField(help_text="The PeMS station ID", primary_key=True, serialize=False)),
+                ("freeway", models.SmallIntegerField(help_text="The freeway number, e.g. 5")),
+                ("direction", models.TextField(help_text="The direction of travel, e.g. N")),
+                ("county", models.SmallIntegerField(blank=True, help_text="The FIPS county code", null=True)),
+                ("city", models.IntegerField(blank=True, help_text="The city code", null=True)),
+                ("state_postmile", models.TextField(blank=True, default="")),
+                ("absolute_postmile", models.FloatField(blank=True, null=True)),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+                (
+                    "length",
+                    models.FloatField(blank=True, help_text="The length of freeway the station covers, in miles", null=True),
+                ),
+                ("type", models.TextField(help_text="The station type, e.g. ML for mainline")),
+                ("lanes", models.SmallIntegerField(default=0)),
+                ("name", models.TextField(blank=True, default="")),
+                (
+                    "district",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="stations", to="districts.district"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("districts", "0003_station"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="station",
+            name="district",
+            field=models.ForeignKey(
+                db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name="stations", to="districts.district"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["district", "id"], name="station_district_id"),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["district", "freeway", "direction", "id"], name="station_district_freeway"),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["district", "type", "id"], name="station_district_type"),
+        ),
+        migrations.AddIndex(
+            model_name="station",
+            index=models.Index(fields=["latitude", "longitude"], name="station_location"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:23
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("districts", "0004_station_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="station",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+    ]
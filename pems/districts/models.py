@@ -1,12 +1,56 @@
 from django.db import models
+from django.db.models.functions import Now
 
 
 class District(models.Model):
     """Data associated with a CalTrans District."""
 
     id = models.AutoField(primary_key=True)
-    number = models.TextField(default="", blank=True, help_text="The number of the Caltrans district")
+    number = models.TextField(unique=True, help_text="The number of the Caltrans district, e.g. 7")
     name = models.TextField(default="", blank=True, help_text="The short name of the Caltrans district")
 
     def __str__(self):
         return f"{self.number} - {self.name}"
+
+    @staticmethod
+    def normalize_number(number) -> str:
+        """The canonical form of a district number, without whitespace or leading zeros, e.g. " 07" becomes "7"."""
+        return str(number).strip().lstrip("0") or "0"
+
+    def save(self, *args, **kwargs):
+        self.number = self.normalize_number(self.number)
+        super().save(*args, **kwargs)
+
+
+class Station(models.Model):
+    """A PeMS detector station, as published in a district's station metadata file."""
+
+    id = models.IntegerField(primary_key=True, help_text="The PeMS station ID")
+    # indexed by the composite indexes below, which all lead with district
+    district = models.ForeignKey(District, on_delete=models.CASCADE, related_name="stations", db_index=False)
+    freeway = models.SmallIntegerField(help_text="The freeway number, e.g. 5")
+    direction = models.TextField(help_text="The direction of travel, e.g. N")
+    county = models.SmallIntegerField(null=True, blank=True, help_text="The FIPS county code")
+    city = models.IntegerField(null=True, blank=True, help_text="The city code")
+    state_postmile = models.TextField(default="", blank=True)
+    absolute_postmile = models.FloatField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    length = models.FloatField(null=True, blank=True, help_text="The length of freeway the station covers, in miles")
+    type = models.TextField(help_text="The station type, e.g. ML for mainline")
+    lanes = models.SmallIntegerField(default=0)
+    name = models.TextField(default="", blank=True)
+    # also defaulted by the database, for rows inserted with COPY by load_stations
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now())
+
+    class Meta:
+        # stations are queried per district, filtered by these columns and paginated in id order
+        indexes = [
+            models.Index(fields=["district", "id"], name="station_district_id"),
+            models.Index(fields=["district", "freeway", "direction", "id"], name="station_district_freeway"),
+            models.Index(fields=["district", "type", "id"], name="station_district_type"),
+            models.Index(fields=["latitude", "longitude"], name="station_location"),
+        ]
+
+    def __str__(self):
+        return f"{self.id} - {self.name}"
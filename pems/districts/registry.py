@@ -0,0 +1,94 @@
+"""
+The districts application: a process-level registry of districts, for the navigation rendered on every page.
+"""
+
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import District
+
+VERSION_KEY = "pems:districts:registry:version"
+
+
+class DistrictRegistry:
+    """
+    Caches every District in process memory, loaded on first use and reloaded after a District is saved or deleted.
+
+    When settings.DISTRICTS_REGISTRY_CACHE names a cache, a version token is shared through it so that a change made
+    in one process also invalidates the registry in every other process. Otherwise the version is unique to this
+    process, so entries it keys in a cache shared with other processes, or kept across a restart, are never mistaken
+    for another process's, and it changes every settings.DISTRICTS_REGISTRY_TTL seconds, so changes made in other
+    processes are loaded within that time.
+    """
+
+    def __init__(self):
+        # (version, districts, districts by number), replaced as a whole so concurrent readers see a consistent state
+        self._state = None
+        self._process = uuid4().hex
+        self._generation = 0
+
+    @property
+    def _cache(self):
+        alias = getattr(settings, "DISTRICTS_REGISTRY_CACHE", None)
+        return caches[alias] if alias else None
+
+    @property
+    def version(self) -> str:
+        """Changes whenever the registry is invalidated, e.g. for use in cache keys."""
+        cache = self._cache
+        if cache is None:
+            ttl = settings.DISTRICTS_REGISTRY_TTL
+            period = int(time.monotonic() // ttl) if ttl else 0
+            return f"{self._process}:{self._generation}:{period}"
+        return cache.get_or_set(VERSION_KEY, uuid4().hex, timeout=None)
+
+    def _current(self, version: str):
+        state = self._state
+        return state if state is not None and state[0] == version else None
+
+    def _store(self, version: str, districts) -> tuple[str, tuple[District, ...], dict[str, District]]:
+        districts = tuple(districts)
+        state = self._state = (version, districts, {district.number: district for district in districts})
+        return state
+
+    def _load(self) -> tuple[str, tuple[District, ...], dict[str, District]]:
+        version = self.version
+        return self._current(version) or self._store(version, District.objects.all())
+
+    async def _aload(self) -> tuple[str, tuple[District, ...], dict[str, District]]:
+        version = self.version
+        return self._current(version) or self._store(version, [district async for district in District.objects.all()])
+
+    def all(self) -> tuple[District, ...]:
+        return self._load()[1]
+
+    async def aall(self) -> tuple[District, ...]:
+        return (await self._aload())[1]
+
+    def get(self, number) -> District | None:
+        """The District with the given number, in any form District.normalize_number accepts, or None."""
+        return self._load()[2].get(District.normalize_number(number))
+
+    async def aget(self, number) -> District | None:
+        return (await self._aload())[2].get(District.normalize_number(number))
+
+    def invalidate(self):
+        self._state = None
+        self._generation += 1
+        cache = self._cache
+        if cache is not None:
+            cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+
+
+registry = DistrictRegistry()
+
+
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=District)
+def invalidate_registry(sender, **kwargs):
+    registry.invalidate()
@@ -11,4 +11,8 @@ urlpatterns = [
     # /districts
     path("", views.IndexView.as_view(), name="index"),
     re_path(r"^(?P<district_number>([1-9]|1[0-2]))$", views.DistrictView.as_view(), name="district"),
+    re_path(r"^(?P<district_number>([1-9]|1[0-2]))/stations$", views.StationsView.as_view(), name="stations"),
+    re_path(
+        r"^(?P<district_number>([1-9]|1[0-2]))/stations/export$", views.StationsExportView.as_view(), name="stations_export"
+    ),
 ]
@@ -1,26 +1,182 @@
-from django.views.generic import TemplateView, DetailView
+import hashlib
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.generic import TemplateView, DetailView, View
+
+from pems import __version__
+from pems.core.cache import CachedPageMixin
+
+from . import export
+from .forms import StationExportForm, StationPageForm
 from .models import District
+from .registry import registry
+
+# the Station fields included in responses, in order
+STATION_FIELDS = (
+    "id",
+    "freeway",
+    "direction",
+    "county",
+    "city",
+    "state_postmile",
+    "absolute_postmile",
+    "latitude",
+    "longitude",
+    "length",
+    "type",
+    "lanes",
+    "name",
+)
+# the Arrow type of each field, for Parquet exports
+STATION_TYPES = {
+    "id": "int32",
+    "freeway": "int16",
+    "direction": "string",
+    "county": "int16",
+    "city": "int32",
+    "state_postmile": "string",
+    "absolute_postmile": "float64",
+    "latitude": "float64",
+    "longitude": "float64",
+    "length": "float64",
+    "type": "string",
+    "lanes": "int16",
+    "name": "string",
+}
+
+
+class DistrictLookupMixin:
+    """Looks up the District numbered by the URL's district_number in the registry, raising Http404 if there is none."""
+
+    def get_district(self) -> District:
+        return self._found(registry.get(self.kwargs["district_number"]))
+
+    async def aget_district(self) -> District:
+        return self._found(await registry.aget(self.kwargs["district_number"]))
+
+    def _found(self, district):
+        if district is None:
+            raise Http404(f"No district found with number {self.kwargs['district_number']}")
+        return district
 
 
-class DistrictContextMixin:
+class DistrictContextMixin(CachedPageMixin):
+
+    def get_cache_version(self):
+        return registry.version
+
+    def _districts_context(self, districts):
+        return {"all": districts, "version": registry.version, "cache_seconds": settings.FRAGMENT_CACHE_SECONDS}
+
+    async def get_districts_context(self):
+        return self._districts_context(await registry.aall())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        districts_ctx = {}
-        districts_ctx["all"] = District.objects.all()
-        context["districts"] = districts_ctx
+        # the async views load the districts without blocking, and pass them in
+        if "districts" not in context:
+            context["districts"] = self._districts_context(registry.all())
         return context
 
 
 class IndexView(DistrictContextMixin, TemplateView):
     template_name = "districts/index.html"
 
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(districts=await self.get_districts_context(), **kwargs)
+        return self.render_to_response(context)
+
 
-class DistrictView(DistrictContextMixin, DetailView):
+class DistrictView(DistrictLookupMixin, DistrictContextMixin, DetailView):
     model = District
     context_object_name = "current_district"
     template_name = "districts/district.html"
 
     def get_object(self):
-        return District.objects.get(number__iexact=self.kwargs["district_number"])
+        return self.get_district()
+
+    async def aget_object(self):
+        return await self.aget_district()
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object, districts=await self.get_districts_context())
+        return self.render_to_response(context)
+
+
+class StationsView(DistrictLookupMixin, View):
+    """
+    A page of a district's stations as JSON, filtered by the StationPageForm query string parameters. Pages are keyset
+    paginated in id order: next links to the following page, or is null on the last one.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        district = await self.aget_district()
+
+        form = StationPageForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        limit = form.cleaned_data["limit"]
+        # one more than the page, to tell whether there is a next page
+        queryset = form.filter(district.stations.all()).values(*STATION_FIELDS)[: limit + 1]
+        stations = [station async for station in queryset]
+
+        next_url = None
+        if len(stations) > limit:
+            stations = stations[:limit]
+            query = request.GET.copy()
+            query["after"] = stations[-1]["id"]
+            next_url = f"{request.path}?{query.urlencode()}"
+
+        return JsonResponse({"district": district.number, "stations": stations, "next": next_url})
+
+
+class StationsExportView(DistrictLookupMixin, View):
+    """
+    Streams a district's stations, filtered by the StationExportForm query string parameters, as CSV or Parquet.
+
+    Rows are read from the database a chunk at a time and encoded as they are sent, so memory stays bounded however
+    many stations match. The ETag changes when a matching station is added, updated or removed, so clients can
+    revalidate a previous export with If-None-Match without downloading it again.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        district = await self.aget_district()
+
+        form = StationExportForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        stations = form.filter(district.stations.all())
+        summary = await stations.aaggregate(count=Count("id"), updated_at=Max("updated_at"))
+        # no Last-Modified: the newest updated_at doesn't change when stations are deleted or leave the filter
+        key = f"{__version__}:{district.number}:{sorted(form.cleaned_data.items())}:{summary['count']}:{summary['updated_at']}"
+        etag = f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        fmt = form.cleaned_data["format"]
+        encoder = (
+            export.ParquetEncoder(STATION_FIELDS, STATION_TYPES) if fmt == "parquet" else export.CsvEncoder(STATION_FIELDS)
+        )
+        chunk_size = export.CHUNK_SIZE
+        # the response is consumed the same way the server serves it, otherwise Django would read every row into memory
+        if isinstance(request, ASGIRequest):
+            # named rows, since aiterator() of plain values_list() rows runs the query in the event loop thread
+            rows = stations.values_list(*STATION_FIELDS, named=True).aiterator(chunk_size=chunk_size)
+            content = export.astream(encoder, rows, chunk_size)
+        else:
+            rows = stations.values_list(*STATION_FIELDS).iterator(chunk_size=chunk_size)
+            content = export.stream(encoder, rows, chunk_size)
+
+        response = StreamingHttpResponse(content, content_type=encoder.content_type)
+        response["Content-Disposition"] = f'attachment; filename="district-{district.number}-stations.{encoder.extension}"'
+        response["ETag"] = etag
+        return response
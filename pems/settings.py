@@ -58,6 +58,23 @@ def set_aws_db_credentials() -> None:
         os.environ["POSTGRES_PASSWORD"] = credentials["password"]
 
 
+def db_pool_options() -> dict | bool:
+    """Helper reads the psycopg connection pool options from environment variables, or False if pooling is disabled."""
+    if os.environ.get("DJANGO_DB_POOL", "true").lower() != "true":
+        return False
+    # a pool per worker process: each connection is opened once and reused by later requests
+    return {
+        "name": "pems",
+        "min_size": int(os.environ.get("DJANGO_DB_POOL_MIN_SIZE", 1)),
+        "max_size": int(os.environ.get("DJANGO_DB_POOL_MAX_SIZE", 4)),
+        # seconds a request waits for a free connection before failing
+        "timeout": float(os.environ.get("DJANGO_DB_POOL_TIMEOUT", 10)),
+        # seconds before idle connections above min_size, and any connection, are closed and replaced
+        "max_idle": float(os.environ.get("DJANGO_DB_POOL_MAX_IDLE", 600)),
+        "max_lifetime": float(os.environ.get("DJANGO_DB_POOL_MAX_LIFETIME", 3600)),
+    }
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -72,9 +89,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so load balancer probes skip every other middleware
+    "pems.core.middleware.Healthcheck",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "pems.core.middleware.Healthcheck",
+    "pems.core.middleware.Instrumentation",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -88,10 +107,21 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "pems", "templates")],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # compiled templates are kept for the life of the process; with DEBUG, runserver's autoreloader
+            # clears them when a template changes
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
+            # the request, auth and messages processors are required by the admin, and only return lazy objects
+            # that are evaluated if a template uses them
             "context_processors": [
-                "django.template.context_processors.debug",
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
@@ -104,17 +134,25 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "pems.wsgi.application"
 
+# compile every template when the application loads, failing on any template error
+WARM_TEMPLATES = os.environ.get("DJANGO_WARM_TEMPLATES", str(not DEBUG)).lower() == "true"
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
 sslmode = os.environ.get("POSTGRES_SSLMODE", "verify-full")
 sslrootcert = os.path.join(BASE_DIR, "certs", "aws_global_postgres_ca_bundle.pem") if sslmode == "verify-full" else None
+db_pool = db_pool_options()
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "OPTIONS": {"sslmode": sslmode, "sslrootcert": sslrootcert},
+        "OPTIONS": {"sslmode": sslmode, "sslrootcert": sslrootcert, "pool": db_pool},
+        # pooled connections are reused by the pool, so Django must not also keep them open itself
+        "CONN_MAX_AGE": 0 if db_pool else int(os.environ.get("DJANGO_DB_CONN_MAX_AGE", 0)),
+        # check connections are still usable before handing them to a request
+        "CONN_HEALTH_CHECKS": os.environ.get("DJANGO_DB_CONN_HEALTH_CHECKS", "true").lower() == "true",
         "NAME": os.environ.get("DJANGO_DB_NAME", "django"),
         "USER": os.environ.get("DJANGO_DB_USER", "django"),
         "PASSWORD": os.environ.get("DJANGO_DB_PASSWORD"),
@@ -132,6 +170,22 @@ if RUNTIME_ENVIRONMENT() == RUNTIME_ENVS.DEV:
     )
 
 
+# Caching
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "pems"),
+    }
+}
+
+# seconds to cache rendered pages for, 0 disables the page cache
+PAGE_CACHE_SECONDS = int(os.environ.get("DJANGO_PAGE_CACHE_SECONDS", 300))
+# seconds to cache rendered template fragments for, e.g. the navigation
+FRAGMENT_CACHE_SECONDS = int(os.environ.get("DJANGO_FRAGMENT_CACHE_SECONDS", 3600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -190,5 +244,38 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "default": {"format": "[{asctime}] {levelname} {name}: {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "default"},
+    },
+    "loggers": {
+        "pems": {"handlers": ["console"], "level": os.environ.get("DJANGO_LOG_LEVEL", "INFO")},
+    },
+}
+
+# Healthcheck settings
+# seconds to reuse the result of the readiness checks for
+READINESS_TTL = float(os.environ.get("DJANGO_READINESS_TTL", 5))
+
+# Instrumentation settings
+# record request timings, send them in Server-Timing headers and log lines, and serve metrics at /metrics
+INSTRUMENTATION = os.environ.get("DJANGO_INSTRUMENTATION", "false").lower() == "true"
+# when set, /metrics requires the header Authorization: Bearer <token>
+INSTRUMENTATION_METRICS_TOKEN = os.environ.get("DJANGO_INSTRUMENTATION_METRICS_TOKEN")
+
 # Streamlit settings
 STREAMLIT_URL = os.environ.get("STREAMLIT_URL", "http://localhost:8501")
+
+# Districts settings
+# name of a cache in CACHES used to share district registry invalidations across processes
+DISTRICTS_REGISTRY_CACHE = os.environ.get("DJANGO_DISTRICTS_REGISTRY_CACHE")
+# without a registry cache, seconds before each process reloads the districts to pick up others' changes, 0 never
+DISTRICTS_REGISTRY_TTL = int(os.environ.get("DJANGO_DISTRICTS_REGISTRY_TTL", 300))
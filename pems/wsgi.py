@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pems.settings")
 
 application = get_wsgi_application()
+
+# imported once the settings are configured, since the module reads them on import
+from pems.core.warmup import warm_if_enabled  # noqa: E402
+
+warm_if_enabled()
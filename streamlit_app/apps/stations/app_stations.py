@@ -1,31 +1,53 @@
-from pathlib import Path
+from datetime import date
 
-import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from streamlit_app.stations import metadata
+from streamlit_app.stations.aggregates import StationCube
+from streamlit_app.stations.index import StationIndex, intersect
+from streamlit_app.stations.spatial import SpatialIndex
+from streamlit_app.stations.thinning import ThinningIndex
 
-APP_DIR = Path(__file__).parent
+# the most stations sent to the browser's map per rerun
+MAP_MAX_POINTS = 2_000
+# the station table is sent to the browser a page at a time
+PAGE_SIZES = [25, 50, 100, 250]
 
+# the cached frame is shared by every session, copy-on-write ensures derived frames never modify it
+pd.set_option("mode.copy_on_write", True)
 
-@st.cache_data()
-def fetch_data():
-    all_files = os.listdir(APP_DIR)
-    # Get station metadata files
-    station_files = [f for f in all_files if "_text_meta_" in f and f.endswith(".txt")]
 
-    df_list = []
-    for f in station_files:
-        file_path = os.path.join(APP_DIR, f)
-        df = pd.read_csv(file_path, delimiter="\t")
-        df_list.append(df)
-    # Combine into a single DataFrame
-    df_all = pd.concat(df_list, ignore_index=True)
+# cached structures are keyed on the snapshots selected with their fingerprints, so they rebuild when a source file
+# changes, bounded to a few selections' worth of memory
+CACHE_ENTRIES = 4
 
-    data = df_all.dropna(subset=["Latitude", "Longitude"])
-    data.loc[:, "State_PM"] = data["State_PM"].astype(str)
-    data.loc[:, "User_ID_1"] = data["User_ID_1"].astype(str)
-    return data
+
+@st.cache_resource(max_entries=CACHE_ENTRIES)
+def fetch_data(selection: tuple[tuple[metadata.Snapshot, str], ...]):
+    # cache_resource returns the same frame to every session, where cache_data would return a fresh copy per rerun
+    return metadata.load_snapshots(tuple(snapshot for snapshot, _ in selection))
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES)
+def fetch_index(selection: tuple[tuple[metadata.Snapshot, str], ...]):
+    return StationIndex(fetch_data(selection))
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES)
+def fetch_cube(selection: tuple[tuple[metadata.Snapshot, str], ...]):
+    return StationCube(fetch_data(selection))
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES)
+def fetch_spatial(selection: tuple[tuple[metadata.Snapshot, str], ...]):
+    return SpatialIndex(fetch_data(selection))
+
+
+@st.cache_resource(max_entries=CACHE_ENTRIES)
+def fetch_thinning(selection: tuple[tuple[metadata.Snapshot, str], ...]):
+    return ThinningIndex(fetch_data(selection))
 
 
 query_params = st.query_params
@@ -34,52 +56,98 @@ district_number = int(district_number) if district_number else district_number
 
 st.set_page_config(layout="wide")
 
-df = fetch_data()
+as_of = query_params.get("as_of", "")
+try:
+    as_of = date.fromisoformat(as_of) if as_of else None  # e.g. as_of=2024-12-31 for a historical snapshot
+except ValueError:
+    st.warning(f"Invalid date: {as_of}, showing the latest stations.")
+    as_of = None
+
 if district_number:
-    # filter to just the current district
-    df = df[df["District"] == district_number]
     st.title(f"District {district_number} Station Viewer")
 else:
     st.title("Districts Station Viewer")
 
-left_col, center_col, right_col = st.columns([1, 2, 2])
-
-with left_col:
-    # Create filters
-    id_options = ["All"] + sorted(df["ID"].dropna().unique().tolist())
-    selected_id = st.selectbox("Select Station", id_options)
-
-    fwy_options = ["All"] + sorted(df["Fwy"].dropna().unique().tolist())
-    selected_fwy = st.selectbox("Select Freeway", fwy_options)
-
-    dir_options = ["All"] + sorted(df["Dir"].dropna().unique().tolist())
-    selected_dir = st.selectbox("Select Direction", dir_options)
-
-    type_options = ["All"] + sorted(df["Type"].dropna().unique().tolist())
-    selected_type = st.selectbox("Select Type", type_options)
+try:
+    # just the current district, if any, so it has its own cache entries
+    snapshots = metadata.resolve(as_of=as_of, district=district_number or None)
+    selection = tuple((snapshot, snapshot.fingerprint) for snapshot in snapshots)
+except FileNotFoundError:
+    st.info("No station metadata is available for this selection.")
+    st.stop()
 
-# Apply filters
-filtered_df = df.copy()
+df = fetch_data(selection)
 
-if selected_id != "All":
-    filtered_df = filtered_df[filtered_df["ID"] == selected_id]
-
-if selected_fwy != "All":
-    filtered_df = filtered_df[filtered_df["Fwy"] == selected_fwy]
+left_col, center_col, right_col = st.columns([1, 2, 2])
 
-if selected_dir != "All":
-    filtered_df = filtered_df[filtered_df["Dir"] == selected_dir]
+index = fetch_index(selection)
 
-if selected_type != "All":
-    filtered_df = filtered_df[filtered_df["Type"] == selected_type]
+with left_col:
+    # Create filters
+    selected_id = st.selectbox("Select Station", ["All"] + index.options["ID"])
+    selected_fwy = st.selectbox("Select Freeway", ["All"] + index.options["Fwy"])
+    selected_dir = st.selectbox("Select Direction", ["All"] + index.options["Dir"])
+    selected_type = st.selectbox("Select Type", ["All"] + index.options["Type"])
+
+    with st.expander("Filter by area"):
+        spatial = fetch_spatial(selection)
+        area = st.radio("Area", ["All", "Bounding box", "Nearest to a point"], label_visibility="collapsed")
+        if area == "Bounding box":
+            north = st.number_input("North", value=float(df["Latitude"].max()), format="%.5f")
+            south = st.number_input("South", value=float(df["Latitude"].min()), format="%.5f")
+            east = st.number_input("East", value=float(df["Longitude"].max()), format="%.5f")
+            west = st.number_input("West", value=float(df["Longitude"].min()), format="%.5f")
+            area_positions = spatial.bbox(south, west, north, east)
+        elif area == "Nearest to a point":
+            latitude = st.number_input("Latitude", value=float(df["Latitude"].median()), format="%.5f")
+            longitude = st.number_input("Longitude", value=float(df["Longitude"].median()), format="%.5f")
+            count = st.number_input("Stations", min_value=1, value=10)
+            area_positions = np.sort(spatial.nearest(latitude, longitude, count)[0])
+        else:
+            area_positions = None
+
+# Apply filters in a single pass over the shared frame, by intersecting the index's row positions for each selection
+selections = {"ID": selected_id, "Fwy": selected_fwy, "Dir": selected_dir, "Type": selected_type}
+selections = {column: None if value == "All" else value for column, value in selections.items()}
+positions = index.select(**selections)
+if area_positions is not None:
+    positions = intersect(positions, area_positions)
+
+if selections["ID"] is None and area_positions is None:
+    # summarize from the precomputed cube, which doesn't cover single stations or areas
+    station_count, distance = fetch_cube(selection).summary(
+        Fwy=selections["Fwy"], Dir=selections["Dir"], Type=selections["Type"]
+    )
+else:
+    station_count, distance = len(positions), float(index.take(df, positions)["Length"].sum())
 
 with center_col:
     # Show filtered data
-    st.write(f"**Stations:** {filtered_df.shape[0]:,.0f}")
-    st.write(f"**Directional distance:** {filtered_df["Length"].sum():,.1f} mi")
-    st.dataframe(filtered_df, use_container_width=True)
+    st.write(f"**Stations:** {station_count:,.0f}")
+    st.write(f"**Directional distance:** {distance:,.1f} mi")
+
+    # Sort and project server-side, and only send the visible page of the table
+    sort_col, order_col, size_col = st.columns([2, 1, 1])
+    sort_by = sort_col.selectbox("Sort by", list(df.columns))
+    ascending = order_col.radio("Order", ["Ascending", "Descending"], label_visibility="hidden") == "Ascending"
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES)
+    columns = st.multiselect("Columns", list(df.columns), default=list(df.columns))
+
+    page_count = max(1, -(-len(positions) // page_size))
+    page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+    page_df = index.page(df, positions, page_number - 1, page_size, sort_by=sort_by, ascending=ascending, columns=columns)
+    st.dataframe(page_df, use_container_width=True)
+    st.caption(f"Page {page_number:,} of {page_count:,}")
 
 with right_col:
-    # Rename columns to match Streamlit's expected format
-    map_df = filtered_df.rename(columns={"Latitude": "latitude", "Longitude": "longitude"})
-    st.map(map_df[["latitude", "longitude"]])
+    # Thin large station sets to a capped number of points that keeps each freeway's shape
+    map_positions = fetch_thinning(selection).thin(positions, MAP_MAX_POINTS)
+    map_stations = index.take(df, map_positions)
+    # Project just the coordinates, named to match Streamlit's expected format
+    # as float64, since the map serializes its center to JSON, which float32 values don't support
+    map_df = pd.DataFrame(
+        {"latitude": map_stations["Latitude"].astype("float64"), "longitude": map_stations["Longitude"].astype("float64")}
+    )
+    st.map(map_df)
+    if len(map_positions) < len(positions):
+        st.caption(f"Showing {len(map_positions):,} of {len(positions):,} stations")
@@ -0,0 +1,32 @@
+"""
+Station aggregates: station counts and total lengths precomputed per District x Fwy x Dir x Type.
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ("District", "Fwy", "Dir", "Type")
+
+
+class StationCube:
+    """Count and total Length of stations grouped by each combination of the dimensions present in the data."""
+
+    def __init__(self, df: pd.DataFrame, dimensions: tuple[str, ...] = CUBE_DIMENSIONS):
+        self.dimensions = dimensions
+        self.frame = (
+            df.groupby(list(dimensions), observed=True, dropna=False)
+            .agg(count=("Length", "size"), length=("Length", "sum"))
+            .reset_index()
+        )
+
+    def summary(self, **selections) -> tuple[int, float]:
+        """
+        The station count and total Length for the dimension=value selections. A value of None means the dimension is
+        not filtered. Sums the matching cells of the cube rather than scanning stations.
+        """
+        mask = np.ones(len(self.frame), dtype=bool)
+        for dimension, value in selections.items():
+            if value is not None:
+                mask &= (self.frame[dimension] == value).to_numpy()
+        cells = self.frame[mask]
+        return int(cells["count"].sum()), float(cells["length"].sum())
@@ -0,0 +1,98 @@
+"""
+Station index: precomputed filter options and row positions for the station viewer's selectboxes.
+"""
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ("ID", "Fwy", "Dir", "Type")
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def intersect(small: np.ndarray, large: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted position arrays, in O(len(small) * log(len(large)))."""
+    if len(small) == 0 or len(large) == 0:
+        return _EMPTY
+    idx = np.searchsorted(large, small).clip(max=len(large) - 1)
+    return small[large[idx] == small]
+
+
+class StationIndex:
+    """Categorical codes and per-value sorted row positions for a frame's filter columns."""
+
+    def __init__(self, df: pd.DataFrame, columns: tuple[str, ...] = FILTER_COLUMNS):
+        self.size = len(df)
+        self.codes = {}
+        self.options = {}
+        self.positions = {}
+        # sort ranks per (column, ascending), computed on first use
+        self.ranks = {}
+
+        for column in columns:
+            # NaN values are coded -1 and are not selectable, the same as dropna() on the options
+            codes, uniques = pd.factorize(df[column], sort=True)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            values = uniques.tolist()
+
+            self.codes[column] = codes
+            self.options[column] = values
+            self.positions[column] = {value: order[start:end] for value, start, end in zip(values, bounds, bounds[1:])}
+
+    def select(self, **selections) -> np.ndarray:
+        """
+        Sorted row positions matching every column=value selection. A value of None means the column is not filtered.
+        Position sets are intersected smallest first, so the cost scales with the matching rows rather than the frame.
+        """
+        matches = [self.positions[column].get(value, _EMPTY) for column, value in selections.items() if value is not None]
+        if not matches:
+            return np.arange(self.size)
+
+        matches.sort(key=len)
+        result = matches[0]
+        for positions in matches[1:]:
+            result = intersect(result, positions)
+        return result
+
+    def take(self, df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+        """
+        The rows of df (the frame this index was built from) at the given positions, taken in a single pass.
+        When every row is selected the shared frame itself is returned rather than a copy.
+        """
+        if len(positions) == self.size:
+            return df
+        return df.take(positions)
+
+    def filter(self, df: pd.DataFrame, **selections) -> pd.DataFrame:
+        """The rows of df (the frame this index was built from) matching the selections."""
+        return self.take(df, self.select(**selections))
+
+    def rank(self, df: pd.DataFrame, column: str, ascending: bool = True) -> np.ndarray:
+        """Each row's position in df sorted by column, with missing values last."""
+        key = (column, ascending)
+        if key not in self.ranks:
+            ranks = df[column].rank(method="first", ascending=ascending, na_option="bottom")
+            self.ranks[key] = ranks.to_numpy(dtype=np.int32)
+        return self.ranks[key]
+
+    def page(
+        self,
+        df: pd.DataFrame,
+        positions: np.ndarray,
+        number: int,
+        size: int,
+        sort_by: str | None = None,
+        ascending: bool = True,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        A single page (numbered from 0) of the rows at positions, optionally sorted and projected to columns.
+        Only the rows and columns of the page are materialized.
+        """
+        if sort_by is not None:
+            positions = positions[np.argsort(self.rank(df, sort_by, ascending)[positions], kind="stable")]
+        start = number * size
+        stop = start + size
+        page = df.take(positions[start:stop])
+        return page if columns is None else page[columns]
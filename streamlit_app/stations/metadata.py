@@ -0,0 +1,232 @@
+"""
+Station metadata: compiles the district text_meta snapshots into a columnar cache for fast loading.
+"""
+
+import argparse
+from dataclasses import dataclass
+from datetime import date
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+logger = logging.getLogger(__name__)
+
+
+DATA_DIR = Path(__file__).parent.parent / "apps" / "stations"
+CACHE_DIR = Path(os.environ.get("STATIONS_CACHE_DIR", Path(tempfile.gettempdir()) / "pems_stations"))
+
+# e.g. d07_text_meta_2023_12_22.txt
+META_FILE_PATTERN = re.compile(r"^d(?P<district>\d{2})_text_meta_(?P<year>\d{4})_(?P<month>\d{2})_(?P<day>\d{2})\.txt$")
+ARTIFACT_SUFFIX = ".arrow"
+# uncompressed, so loading maps the artifact's buffers rather than decompressing them into private memory
+ARTIFACT_COMPRESSION = "uncompressed"
+
+STRING = pd.StringDtype("pyarrow")
+# compact dtypes for the text_meta columns, applied at read time; integers are nullable, since snapshots have blank cells
+SCHEMA = {
+    "ID": "Int32",
+    "Fwy": "Int16",
+    "Dir": "category",
+    "District": "int8",
+    "County": "Int8",
+    "City": "Int32",
+    "State_PM": STRING,
+    "Abs_PM": "float32",
+    "Latitude": "float32",
+    "Longitude": "float32",
+    "Length": "float32",
+    "Type": "category",
+    "Lanes": "Int8",
+    "Name": STRING,
+    "User_ID_1": STRING,
+    "User_ID_2": STRING,
+    "User_ID_3": STRING,
+    "User_ID_4": STRING,
+}
+# numeric codes, categorized after parsing so that their categories keep numeric (rather than string) order
+NUMERIC_CATEGORIES = ("Fwy", "County", "City", "Lanes")
+# restore Arrow-backed strings when loading artifacts, rather than converting them to Python objects
+_ARROW_TYPES = {pa.string(): STRING, pa.large_string(): STRING}
+
+
+@dataclass(frozen=True, order=True)
+class Snapshot:
+    """A single district's station metadata file, as published on a given date."""
+
+    district: int
+    date: date
+    path: Path
+
+    @classmethod
+    def from_path(cls, path: Path) -> "Snapshot | None":
+        match = META_FILE_PATTERN.match(path.name)
+        if not match:
+            return None
+        snapshot_date = date(int(match["year"]), int(match["month"]), int(match["day"]))
+        return cls(district=int(match["district"]), date=snapshot_date, path=path)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the name, size and modification time of the source file, and how it is compiled."""
+        stat = self.path.stat()
+        key = f"{self.path.name}:{stat.st_size}:{stat.st_mtime_ns}:{SCHEMA}:{NUMERIC_CATEGORIES}:{ARTIFACT_COMPRESSION}"
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def artifact_path(self, cache_dir: Path) -> Path:
+        return cache_dir / f"{self.path.stem}-{self.fingerprint}{ARTIFACT_SUFFIX}"
+
+
+def snapshots(data_dir: Path = DATA_DIR) -> dict[int, list[Snapshot]]:
+    """Index the metadata files in data_dir by district, each district's snapshots sorted oldest to newest."""
+    index = {}
+    for path in sorted(data_dir.iterdir()):
+        snapshot = Snapshot.from_path(path)
+        if snapshot:
+            index.setdefault(snapshot.district, []).append(snapshot)
+    for district_snapshots in index.values():
+        district_snapshots.sort()
+    return index
+
+
+def select(index: dict[int, list[Snapshot]], as_of: date | None = None, district: int | None = None) -> list[Snapshot]:
+    """Select the newest snapshot per district, optionally as of a given date and/or for a single district."""
+    districts = sorted(index) if district is None else [district]
+    selected = []
+    for d in districts:
+        candidates = [s for s in index.get(d, []) if as_of is None or s.date <= as_of]
+        if candidates:
+            selected.append(candidates[-1])
+    return selected
+
+
+def _numeric_category(series: pd.Series) -> pd.Series:
+    categorical = series.astype("category")
+    categories = categorical.cat.categories
+    if isinstance(categories.dtype, pd.api.extensions.ExtensionDtype):
+        # categories never hold missing values, so store nullable integers as plain numpy ones that round trip through Arrow
+        categorical = categorical.cat.rename_categories(categories.to_numpy(categories.dtype.numpy_dtype))
+    return categorical
+
+
+def _read_meta_file(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path, delimiter="\t", dtype=SCHEMA)
+    for column in NUMERIC_CATEGORIES:
+        if column in df:
+            df[column] = _numeric_category(df[column])
+    return df
+
+
+def _compile(snapshot: Snapshot) -> pd.DataFrame:
+    df = _read_meta_file(snapshot.path)
+    df = df.dropna(subset=["Latitude", "Longitude"]).reset_index(drop=True)
+    for column in df.select_dtypes("category"):
+        df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def _remove_stale(cache_dir: Path, snapshot: Snapshot, keep: Path):
+    for artifact in cache_dir.glob(f"{snapshot.path.stem}-*{ARTIFACT_SUFFIX}"):
+        if artifact != keep:
+            logger.info(f"Removing stale station artifact: {artifact}")
+            artifact.unlink(missing_ok=True)
+
+
+def _build_snapshot(snapshot: Snapshot, cache_dir: Path) -> Path:
+    artifact = snapshot.artifact_path(cache_dir)
+    if artifact.exists():
+        return artifact
+
+    logger.info(f"Compiling station metadata {snapshot.path.name} into {artifact}")
+    df = _compile(snapshot)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first so that concurrent readers never see a partial artifact
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_feather(tmp_path, compression=ARTIFACT_COMPRESSION)
+        os.replace(tmp_path, artifact)
+    finally:
+        Path(tmp_path).unlink(missing_ok=True)
+
+    _remove_stale(cache_dir, snapshot, artifact)
+    return artifact
+
+
+def resolve(data_dir: Path = DATA_DIR, as_of: date | None = None, district: int | None = None) -> tuple[Snapshot, ...]:
+    """
+    The snapshots to load: the newest per district, optionally as of a given date and/or for a single district.
+    Any number of dates between two snapshots resolve to the same ones, so they make a stable cache key.
+    """
+    selected = select(snapshots(data_dir), as_of, district)
+    if not selected:
+        raise FileNotFoundError(
+            f"No station metadata files found in {data_dir}"
+            + (f" for district {district}" if district is not None else "")
+            + (f" as of {as_of}" if as_of else "")
+        )
+    return tuple(selected)
+
+
+def build(
+    data_dir: Path = DATA_DIR, cache_dir: Path = CACHE_DIR, as_of: date | None = None, district: int | None = None
+) -> list[Path]:
+    """Compile the selected snapshots in data_dir into Arrow IPC artifacts, unless they are already up to date."""
+    return [_build_snapshot(snapshot, cache_dir) for snapshot in resolve(data_dir, as_of, district)]
+
+
+def load_snapshots(selected: tuple[Snapshot, ...], cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """Load the given snapshots by memory-mapping their compiled artifacts, rebuilding any whose source file changed."""
+    artifacts = [_build_snapshot(snapshot, cache_dir) for snapshot in selected]
+    frames = [feather.read_table(artifact, memory_map=True).to_pandas(types_mapper=_ARROW_TYPES.get) for artifact in artifacts]
+    return _concat(frames)
+
+
+def load(
+    data_dir: Path = DATA_DIR, cache_dir: Path = CACHE_DIR, as_of: date | None = None, district: int | None = None
+) -> pd.DataFrame:
+    """
+    Load the newest station metadata per district (or the newest as of a given date) by memory-mapping the compiled
+    artifacts, rebuilding any whose source file changed. When district is given, only that district's file is read.
+    """
+    return load_snapshots(resolve(data_dir, as_of, district), cache_dir)
+
+
+def _concat(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate frames, unifying categories so that categorical columns don't fall back to objects."""
+    if len(frames) > 1:
+        for column in frames[0].select_dtypes("category"):
+            categories = sorted(set().union(*(frame[column].cat.categories for frame in frames)))
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Each column's dtype and memory footprint in bytes, including the contents of strings, with a total."""
+    usage = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage})
+    report.loc["Total"] = ["", usage.sum()]
+    return report
+
+
+if __name__ == "__main__":  # pragma: no cover
+    parser = argparse.ArgumentParser(description="Compile the station metadata files into columnar artifacts.")
+    parser.add_argument("--report", action="store_true", help="Print the memory footprint of the loaded metadata.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    for artifact in build():
+        print(artifact)
+
+    if args.report:
+        compact = memory_report(load())
+        inferred = memory_report(pd.concat(pd.read_csv(s.path, delimiter="\t") for s in select(snapshots())))
+        print(compact.join(inferred, rsuffix="_inferred").to_string())
@@ -0,0 +1,99 @@
+"""
+Station spatial index: a uniform grid over station coordinates for bounding-box and nearest-station queries.
+"""
+
+import numpy as np
+import pandas as pd
+
+# grid cell size in degrees, roughly 5.5 km of latitude
+CELL_SIZE = 0.05
+EARTH_RADIUS_KM = 6371.0088
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometers between points given in degrees."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """Row positions bucketed by grid cell, so queries only visit the cells they overlap."""
+
+    def __init__(self, df: pd.DataFrame, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.lat = df["Latitude"].to_numpy(dtype=np.float64)
+        self.lon = df["Longitude"].to_numpy(dtype=np.float64)
+
+        if len(df):
+            self.lat_min, self.lon_min = self.lat.min(), self.lon.min()
+            self.rows = int((self.lat.max() - self.lat_min) // cell_size) + 1
+            self.cols = int((self.lon.max() - self.lon_min) // cell_size) + 1
+        else:
+            self.lat_min = self.lon_min = 0.0
+            self.rows = self.cols = 0
+
+        keys = self._row(self.lat) * self.cols + self._col(self.lon)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def _row(self, lat):
+        return np.clip(((np.asarray(lat) - self.lat_min) // self.cell_size).astype(np.int64), 0, max(self.rows - 1, 0))
+
+    def _col(self, lon):
+        return np.clip(((np.asarray(lon) - self.lon_min) // self.cell_size).astype(np.int64), 0, max(self.cols - 1, 0))
+
+    def _cells(self, row_start: int, row_end: int, col_start: int, col_end: int) -> np.ndarray:
+        """Positions in the inclusive block of grid cells; each row of cells is one contiguous run of sorted keys."""
+        row_start, col_start = max(row_start, 0), max(col_start, 0)
+        row_end, col_end = min(row_end, self.rows - 1), min(col_end, self.cols - 1)
+        if row_start > row_end or col_start > col_end:
+            return _EMPTY
+
+        rows = np.arange(row_start, row_end + 1) * self.cols
+        starts = np.searchsorted(self.keys, rows + col_start, side="left")
+        ends = np.searchsorted(self.keys, rows + col_end, side="right")
+        runs = [self.order[start:end] for start, end in zip(starts, ends) if end > start]
+        return np.concatenate(runs) if runs else _EMPTY
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """Sorted positions of the stations within the bounding box, inclusive."""
+        if self.rows == 0 or south > north or west > east:
+            return _EMPTY
+        if north < self.lat_min or east < self.lon_min:
+            return _EMPTY
+
+        candidates = self._cells(int(self._row(south)), int(self._row(north)), int(self._col(west)), int(self._col(east)))
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+        return np.sort(candidates[inside])
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Positions of the k stations nearest to the point, closest first, and their distances in kilometers.
+        Searches outward ring by ring until the k-th nearest candidate is closer than any unvisited cell can be.
+        """
+        k = min(k, len(self.lat))
+        if k <= 0:
+            return _EMPTY, np.empty(0)
+
+        row, col = int(self._row(lat)), int(self._col(lon))
+        radius = 0
+        while True:
+            candidates = self._cells(row - radius, row + radius, col - radius, col + radius)
+            covers_grid = radius >= max(row, col, self.rows - 1 - row, self.cols - 1 - col)
+            if len(candidates) >= k:
+                distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+                nearest = np.argsort(distances, kind="stable")[:k]
+                if covers_grid or distances[nearest[-1]] <= self._reach_km(lat, radius):
+                    return candidates[nearest], distances[nearest]
+            radius += 1
+
+    def _reach_km(self, lat: float, radius: int) -> float:
+        """A lower bound on the distance from the point to any cell outside the searched block."""
+        # the point may sit anywhere in its own cell, so the block is only guaranteed to extend radius cells around it
+        reach_deg = radius * self.cell_size
+        widest_lat = min(abs(lat) + reach_deg, 90.0)
+        return float(np.radians(reach_deg) * EARTH_RADIUS_KM * np.cos(np.radians(widest_lat)))
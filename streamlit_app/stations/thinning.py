@@ -0,0 +1,60 @@
+"""
+Station thinning: a zoom-dependent point-thinning index that caps the number of stations sent to the map.
+"""
+
+import numpy as np
+import pandas as pd
+
+LEVELS = 12
+
+
+class ThinningIndex:
+    """
+    Grid cells of each row at every level (level L divides the extent into 2^L x 2^L cells). Thinning a selection keeps
+    the first selected row of each group in each cell at the finest level that fits, so every group in the selection,
+    e.g. a freeway, keeps its shape.
+    """
+
+    def __init__(self, df: pd.DataFrame, group: str = "Fwy", levels: int = LEVELS):
+        self.levels = levels
+        self.groups = pd.factorize(df[group])[0].astype(np.int64)
+        if len(df) == 0:
+            self.cell_y = self.cell_x = np.empty(0, dtype=np.int64)
+            return
+
+        lat = df["Latitude"].to_numpy(dtype=np.float64)
+        lon = df["Longitude"].to_numpy(dtype=np.float64)
+
+        # normalize coordinates to [0, 1) over the extent of the data, then to cells at the finest level; a coarser
+        # level's cells are these shifted right
+        y = (lat - lat.min()) / max(np.ptp(lat), np.finfo(np.float64).eps)
+        x = (lon - lon.min()) / max(np.ptp(lon), np.finfo(np.float64).eps)
+        cells = 2**levels
+        self.cell_y = np.minimum((y * cells).astype(np.int64), cells - 1)
+        self.cell_x = np.minimum((x * cells).astype(np.int64), cells - 1)
+
+    def _representatives(self, positions: np.ndarray, level: int) -> np.ndarray:
+        """Indexes into positions of the first row of each (group, cell) at the level."""
+        shift = self.levels - level
+        cells = 2**level
+        keys = (self.groups[positions] * cells + (self.cell_y[positions] >> shift)) * cells + (self.cell_x[positions] >> shift)
+        return np.unique(keys, return_index=True)[1]
+
+    def thin(self, positions: np.ndarray, max_points: int) -> np.ndarray:
+        """
+        The representatives among positions at the finest level with no more than max_points of them, or at the coarsest
+        level (one per group) if none fit. Representatives are chosen from the selected positions, so filtering never
+        leaves cells of a group empty.
+        """
+        if len(positions) <= max_points:
+            return positions
+
+        # the first row of a cell is also the first of its cell at every finer level, so each level's representatives
+        # include the coarser levels', and their number only grows with the level
+        chosen = self._representatives(positions, 0)
+        for level in range(1, self.levels + 1):
+            representatives = self._representatives(positions, level)
+            if len(representatives) > max_points:
+                break
+            chosen = representatives
+        return positions[np.sort(chosen)]
@@ -0,0 +1,100 @@
+"""
+Benchmark of template render time per page, with the context processors built for every render (before) and with the
+static context precomputed (after, the current settings).
+
+Run from the repository root with:
+
+    python -m tests.benchmarks.render_context [--number N] [--repeat R]
+"""
+
+import argparse
+import os
+import timeit
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.pytest.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.contrib.messages.storage.fallback import FallbackStorage  # noqa: E402
+from django.contrib.sessions.backends.signed_cookies import SessionStore  # noqa: E402
+from django.template import RequestContext, engines  # noqa: E402
+from django.template.loader import get_template  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+
+from pems import __version__  # noqa: E402
+from pems.districts.models import District  # noqa: E402
+
+DISTRICTS = tuple(District(number=str(n), name=f"District {n}") for n in range(1, 13))
+DISTRICTS_CONTEXT = {"all": DISTRICTS, "version": "benchmark", "cache_seconds": settings.FRAGMENT_CACHE_SECONDS}
+PAGES = {
+    "core/index.html": {},
+    "districts/index.html": {"districts": DISTRICTS_CONTEXT},
+    "districts/district.html": {"districts": DISTRICTS_CONTEXT, "current_district": DISTRICTS[3]},
+}
+# the processors before the static context was precomputed
+BEFORE_PROCESSORS = [
+    "django.template.context_processors.debug",
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+    "tests.benchmarks.render_context.pems_version",
+    "tests.benchmarks.render_context.streamlit",
+]
+
+
+def pems_version(request):
+    return {"pems_version": __version__}
+
+
+def streamlit(request):
+    return {"streamlit": {"url": settings.STREAMLIT_URL}}
+
+
+def _request():
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    request.session = SessionStore()
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def measure(number: int) -> dict[str, float]:
+    """The render time in microseconds of the processors with a minimal template, and of each page."""
+    request = _request()
+    minimal = engines["django"].engine.from_string("{{ pems_version }} {{ streamlit.url }}")
+    # the processors are bound to each RequestContext rendered
+    timings = {
+        "processors plus a minimal template": timeit.timeit(lambda: minimal.render(RequestContext(request, {})), number=number)
+    }
+    for name, context in PAGES.items():
+        template = get_template(name)
+        timings[name] = timeit.timeit(lambda: template.render(context, request), number=number)
+    return {name: seconds / number * 1e6 for name, seconds in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=3000, help="Renders per timing.")
+    parser.add_argument("--repeat", type=int, default=7, help="Timings, of which the minimum is reported.")
+    args = parser.parse_args()
+
+    before_templates = [{**settings.TEMPLATES[0], "OPTIONS": {**settings.TEMPLATES[0]["OPTIONS"]}}]
+    before_templates[0]["OPTIONS"]["context_processors"] = BEFORE_PROCESSORS
+    before, after = [], []
+    # alternated, so that drift in the machine's load affects both alike
+    for _ in range(args.repeat):
+        with override_settings(TEMPLATES=before_templates):
+            before.append(measure(args.number))
+        after.append(measure(args.number))
+
+    print(f"min of {args.repeat} x {args.number} renders, before -> after:")
+    for name in before[0]:
+        print(f"- {name}: {min(t[name] for t in before):.1f} -> {min(t[name] for t in after):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
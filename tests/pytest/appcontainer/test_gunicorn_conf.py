@@ -0,0 +1,148 @@
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+import pytest
+
+CONF = Path(__file__).resolve().parents[3] / "appcontainer" / "gunicorn.conf.py"
+GB = 1024**3
+
+
+def load():
+    spec = spec_from_file_location("gunicorn_conf", CONF)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    for name in ("GUNICORN_ASGI", "GUNICORN_WORKER_CLASS", "GUNICORN_WORKERS", "GUNICORN_THREADS", "DJANGO_DB_POOL_MAX_SIZE"):
+        # set first, so the variable is restored even though loading the config sets it
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+    return load()
+
+
+@pytest.fixture
+def cgroup(tmp_path):
+    def write(path, content):
+        file = tmp_path / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_text(content)
+
+    return write
+
+
+def test_cgroup_v2(conf, cgroup, tmp_path):
+    cgroup("cpu.max", "50000 100000\n")
+    cgroup("memory.max", "536870912\n")
+
+    assert conf.cgroup_cpu_limit(tmp_path) == 0.5
+    assert conf.cgroup_memory_limit(tmp_path) == 512 * 1024**2
+
+
+def test_cgroup_v2_unlimited(conf, cgroup, tmp_path):
+    cgroup("cpu.max", "max 100000\n")
+    cgroup("memory.max", "max\n")
+
+    assert conf.cgroup_cpu_limit(tmp_path) is None
+    assert conf.cgroup_memory_limit(tmp_path) is None
+
+
+def test_cgroup_v1(conf, cgroup, tmp_path):
+    cgroup("cpu/cpu.cfs_quota_us", "200000\n")
+    cgroup("cpu/cpu.cfs_period_us", "100000\n")
+    cgroup("memory/memory.limit_in_bytes", str(2 * GB))
+
+    assert conf.cgroup_cpu_limit(tmp_path) == 2
+    assert conf.cgroup_memory_limit(tmp_path) == 2 * GB
+
+
+def test_cgroup_v1_unlimited(conf, cgroup, tmp_path):
+    cgroup("cpu/cpu.cfs_quota_us", "-1\n")
+    cgroup("cpu/cpu.cfs_period_us", "100000\n")
+    cgroup("memory/memory.limit_in_bytes", "9223372036854771712\n")
+
+    assert conf.cgroup_cpu_limit(tmp_path) is None
+    assert conf.cgroup_memory_limit(tmp_path) is None
+
+
+def test_no_cgroup(conf, tmp_path):
+    assert conf.cgroup_cpu_limit(tmp_path) is None
+    assert conf.cgroup_memory_limit(tmp_path) is None
+
+
+def test_available_cpus_quota(conf, cgroup, tmp_path, mocker):
+    mocker.patch("os.sched_getaffinity", return_value=set(range(16)), create=True)
+    cgroup("cpu.max", "25000 100000\n")
+
+    assert conf.available_cpus(tmp_path) == 0.25
+
+
+def test_available_cpus_no_quota(conf, tmp_path, mocker):
+    mocker.patch("os.sched_getaffinity", return_value=set(range(16)), create=True)
+
+    assert conf.available_cpus(tmp_path) == 16
+
+
+@pytest.mark.parametrize(
+    "cpus,memory,expected",
+    [
+        (0.25, 512 * 1024**2, ("gthread", 1, 2)),
+        (1, 2 * GB, ("gthread", 1, 3)),
+        (2, 4 * GB, ("sync", 5, 1)),
+        (4, None, ("sync", 9, 1)),
+        # not enough memory for 9 processes
+        (4, 1 * GB, ("gthread", 4, 3)),
+    ],
+)
+def test_topology(conf, cpus, memory, expected):
+    assert conf.topology(cpus, memory) == expected
+
+
+@pytest.mark.parametrize("cpus,memory,workers", [(0.5, None, 1), (4, None, 4), (4, 512 * 1024**2, 2)])
+def test_topology_asgi(conf, cpus, memory, workers):
+    assert conf.topology(cpus, memory, asgi=True) == (conf.ASGI_WORKER_CLASS, workers, 1)
+
+
+def test_asgi(conf):
+    assert conf.wsgi_app == "pems.asgi:application"
+    assert conf.worker_class == conf.ASGI_WORKER_CLASS
+    assert "DJANGO_DB_POOL_MAX_SIZE" not in conf.os.environ
+
+
+def test_wsgi(conf, monkeypatch):
+    monkeypatch.setenv("GUNICORN_ASGI", "false")
+    module = load()
+
+    assert module.wsgi_app == "pems.wsgi:application"
+    assert module.worker_class != conf.ASGI_WORKER_CLASS
+
+
+def test_environment_overrides(conf, monkeypatch):
+    monkeypatch.setenv("GUNICORN_WORKER_CLASS", "sync")
+    monkeypatch.setenv("GUNICORN_WORKERS", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "1")
+    module = load()
+
+    assert (module.worker_class, module.workers, module.threads) == ("sync", 3, 1)
+
+
+def test_db_pool_max_size(conf, monkeypatch):
+    monkeypatch.setenv("GUNICORN_ASGI", "false")
+    module = load()
+
+    assert module.os.environ["DJANGO_DB_POOL_MAX_SIZE"] == str(module.threads)
+
+
+def test_max_requests_jitter(conf):
+    assert conf.max_requests_jitter == conf.max_requests // 10
+
+
+def test_on_starting(conf, mocker):
+    server = mocker.Mock()
+
+    conf.on_starting(server)
+
+    message = server.log.info.call_args.args[0]
+    assert f"{conf.workers} {conf.worker_class} worker(s)" in message
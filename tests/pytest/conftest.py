@@ -3,7 +3,17 @@ from pytest_socket import disable_socket
 
 
 def pytest_runtest_setup():
-    disable_socket()
+    # async views run in an event loop, which needs a local socket pair
+    disable_socket(allow_unix_socket=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Caches live for the whole process, so don't let cached pages leak between tests."""
+    from django.core.cache import caches
+
+    for cache in caches.all(initialized_only=True):
+        cache.clear()
 
 
 @pytest.fixture
@@ -1,6 +1,15 @@
 import pytest
 
 from pems.districts.models import District
+from pems.districts.registry import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_district_registry():
+    """The registry lives for the whole process, so clear anything cached from other tests' (rolled back) data."""
+    registry.invalidate()
+    yield
+    registry.invalidate()
 
 
 @pytest.fixture
@@ -1,10 +1,13 @@
+from contextlib import nullcontext
+import threading
+
 import psycopg
 import pytest
 from django.core.management.base import CommandError
-from django.db import DEFAULT_DB_ALIAS
+from django.db import DEFAULT_DB_ALIAS, ProgrammingError
 from psycopg import sql
 
-from pems.core.management.commands.ensure_db import Command
+from pems.core.management.commands.ensure_db import MIGRATION_LOCK_ID, Command
 
 # ignore UserWarnings about modifying settings.DATABASE, the whole purpose of these tests!
 pytestmark = pytest.mark.filterwarnings("ignore:Overriding setting DATABASES")
@@ -347,13 +350,29 @@ def test_ensure_schema_permissions_success(command, mock_admin_connection, mocke
     command._admin_connection.assert_called_once_with(db_name)
 
     # Verify grant query was executed with correct SQL
-    expected_sql = sql.SQL("GRANT USAGE, CREATE ON SCHEMA public TO {user}").format(user=sql.Identifier(db_user))
+    expected_sql = sql.SQL("GRANT USAGE, CREATE ON SCHEMA public TO {users}").format(
+        users=sql.SQL(", ").join([sql.Identifier(db_user)])
+    )
     mock_cursor.execute.assert_called_once_with(expected_sql)
 
     # Verify connection was closed
     assert mock_admin_connection.closed is True
 
 
+def test_ensure_schema_permissions_multiple_users(command, mock_admin_connection, mocker):
+    """All of a database's users are granted permissions over a single connection."""
+    mocker.patch.object(command, "_admin_connection", return_value=mock_admin_connection)
+    mock_cursor = command._admin_connection.return_value.cursor.return_value.__enter__.return_value
+
+    command._ensure_schema_permissions("test_db", "u1", "u2")
+
+    command._admin_connection.assert_called_once_with("test_db")
+    expected_sql = sql.SQL("GRANT USAGE, CREATE ON SCHEMA public TO {users}").format(
+        users=sql.SQL(", ").join([sql.Identifier("u1"), sql.Identifier("u2")])
+    )
+    mock_cursor.execute.assert_called_once_with(expected_sql)
+
+
 def test_ensure_schema_permissions_psycopg_error(command, mock_admin_connection, mocker):
     """Test handling of psycopg error during schema permission grant."""
     db_name = "error_db"
@@ -385,68 +404,97 @@ def test_ensure_schema_permissions_admin_connection_failure(command, mocker):
     command._admin_connection.assert_called_once_with(db_name)
 
 
-def test_ensure_users_and_db_creates_new_user_and_db(command, mock_admin_connection, mock_psycopg_cursor, settings, mocker):
-    admin_user = "admin_user"
-    db_name_val = "example_db"
-    db_user_val = "example_user"
-    db_password_val = "example_password"
-    db_config_dict = {
+@pytest.fixture
+def db_config():
+    return {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": db_name_val,
-        "USER": db_user_val,
-        "PASSWORD": db_password_val,
+        "NAME": "example_db",
+        "USER": "example_user",
+        "PASSWORD": "example_password",
     }
-    settings.DATABASES = {DB_TEST_ALIAS: db_config_dict}
 
-    # Mock helper methods
-    mocker.patch.object(command, "_validate_config", return_value=(db_name_val, db_user_val, db_password_val))
-    mocker.patch.object(command, "_user_exists", return_value=False)  # User does not exist
+
+@pytest.fixture
+def mock_existing(command, mocker):
+    return mocker.patch.object(command, "_existing", return_value=(set(), set()))
+
+
+@pytest.mark.parametrize(
+    "rows,users,databases",
+    [
+        ([], set(), set()),
+        ([("user", "u1"), ("database", "db1"), ("user", "u2")], {"u1", "u2"}, {"db1"}),
+    ],
+)
+def test_existing(command, mock_psycopg_cursor, rows, users, databases):
+    mock_psycopg_cursor.fetchall.return_value = rows
+
+    result = command._existing(mock_psycopg_cursor, ["u1", "u2"], ["db1", "db2"])
+
+    assert result == (users, databases)
+    # a single round trip for every user and database
+    mock_psycopg_cursor.execute.assert_called_once()
+    assert mock_psycopg_cursor.execute.call_args.args[1] == [["u1", "u2"], ["db1", "db2"]]
+
+
+def test_configs(command, settings):
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
+        "incomplete": {"ENGINE": "django.db.backends.postgresql", "NAME": "db2"},
+        "other_db": {"ENGINE": "django.db.backends.sqlite3", "NAME": "other"},
+    }
+
+    assert command._configs() == [(DEFAULT_DB_ALIAS, "db1", "u1", "p1")]
+
+
+def test_ensure_users_and_db_creates_new_user_and_db(
+    command, mock_admin_connection, mock_psycopg_cursor, mock_existing, settings, mocker, db_config
+):
+    settings.DATABASES = {DB_TEST_ALIAS: db_config}
     mock_create_user = mocker.patch.object(command, "_create_database_user")
-    mocker.patch.object(command, "_database_exists", return_value=False)  # Database does not exist
     mock_create_db = mocker.patch.object(command, "_create_database")
-    mock_ensure_schema_permissions = mocker.patch.object(command, "_ensure_schema_permissions")
-    mock_admin_connection.info.user = admin_user
+    mock_admin_connection.info.user = "admin_user"
 
-    command._ensure_users_and_db(mock_admin_connection)
+    created = command._ensure_users_and_db(mock_admin_connection)
 
-    # Verify calls to helpers
-    command._validate_config.assert_called_once_with(DB_TEST_ALIAS, db_config_dict)
-    command._user_exists.assert_called_once_with(mock_psycopg_cursor, db_user_val)
-    mock_create_user.assert_called_once_with(mock_psycopg_cursor, admin_user, DB_TEST_ALIAS, db_user_val, db_password_val)
-    command._database_exists.assert_called_once_with(mock_psycopg_cursor, db_name_val)
-    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, db_name_val, db_user_val)
-    mock_ensure_schema_permissions.assert_called_once_with(db_name_val, db_user_val)
+    mock_existing.assert_called_once_with(mock_psycopg_cursor, ["example_user"], ["example_db"])
+    mock_create_user.assert_called_once_with(
+        mock_psycopg_cursor, "admin_user", DB_TEST_ALIAS, "example_user", "example_password"
+    )
+    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, "example_db", "example_user")
+    # schema permissions are granted later, with the migrations
+    assert created == {"example_db": ["example_user"]}
 
     mock_psycopg_cursor.close.assert_called_once()
 
 
-def test_ensure_users_and_db_user_exists_db_not_exists(command, mock_admin_connection, mock_psycopg_cursor, settings, mocker):
-    db_name_val = "another_example_db"
-    db_user_val = "current_user"
-    db_password_val = "pwd123"
-    db_config_dict = {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": db_name_val,
-        "USER": db_user_val,
-        "PASSWORD": db_password_val,
-    }
-    settings.DATABASES = {DB_TEST_ALIAS: db_config_dict}
-
-    mocker.patch.object(command, "_validate_config", return_value=(db_name_val, db_user_val, db_password_val))
-    mocker.patch.object(command, "_user_exists", return_value=True)  # User exists
+def test_ensure_users_and_db_user_exists_db_not_exists(
+    command, mock_admin_connection, mock_psycopg_cursor, mock_existing, settings, mocker, db_config
+):
+    settings.DATABASES = {DB_TEST_ALIAS: db_config}
+    mock_existing.return_value = ({"example_user"}, set())
     mock_create_user = mocker.patch.object(command, "_create_database_user")
-    mocker.patch.object(command, "_database_exists", return_value=False)  # DB does not exist
     mock_create_db = mocker.patch.object(command, "_create_database")
-    mock_ensure_schema_permissions = mocker.patch.object(command, "_ensure_schema_permissions")
 
-    command._ensure_users_and_db(mock_admin_connection)
+    created = command._ensure_users_and_db(mock_admin_connection)
 
-    command._validate_config.assert_called_once_with(DB_TEST_ALIAS, db_config_dict)
-    command._user_exists.assert_called_once_with(mock_psycopg_cursor, db_user_val)
     mock_create_user.assert_not_called()
-    command._database_exists.assert_called_once_with(mock_psycopg_cursor, db_name_val)
-    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, db_name_val, db_user_val)
-    mock_ensure_schema_permissions.assert_called_once_with(db_name_val, db_user_val)
+    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, "example_db", "example_user")
+    assert created == {"example_db": ["example_user"]}
+
+
+def test_ensure_users_and_db_shared_user_and_db(command, mock_admin_connection, mock_existing, settings, mocker, db_config):
+    """Aliases of the same database and user create each of them once."""
+    settings.DATABASES = {DEFAULT_DB_ALIAS: db_config, DB_TEST_ALIAS: db_config}
+    mock_create_user = mocker.patch.object(command, "_create_database_user")
+    mock_create_db = mocker.patch.object(command, "_create_database")
+
+    created = command._ensure_users_and_db(mock_admin_connection)
+
+    mock_existing.assert_called_once()
+    mock_create_user.assert_called_once()
+    mock_create_db.assert_called_once()
+    assert created == {"example_db": ["example_user"]}
 
 
 def test_ensure_users_and_db_skips_non_postgres(command, mock_admin_connection, mock_psycopg_cursor, settings):
@@ -455,133 +503,201 @@ def test_ensure_users_and_db_skips_non_postgres(command, mock_admin_connection,
         DB_TEST_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
         db_alias_sqlite: {"ENGINE": "django.db.backends.sqlite3", "NAME": "test.db"},
     }
-    mock_psycopg_cursor.fetchone.return_value = (1,)  # Assume PG db and user exist
+    # Assume PG db and user exist
+    mock_psycopg_cursor.fetchall.return_value = [("user", "u1"), ("database", "db1")]
 
-    command._ensure_users_and_db(mock_admin_connection)
+    created = command._ensure_users_and_db(mock_admin_connection)
 
+    assert created == {}
     command.stdout.write.assert_any_call(
         command.style.WARNING(f"Skipping database {db_alias_sqlite}, ENGINE is not PostgreSQL.")
     )
 
 
-def test_ensure_users_and_db_incomplete_config(command, mock_admin_connection, settings, mocker):
+def test_ensure_users_and_db_incomplete_config(command, mock_admin_connection, mock_existing, settings, mocker):
     db_config_incomplete = {"ENGINE": "django.db.backends.postgresql", "NAME": "db1"}
     settings.DATABASES = {DB_TEST_ALIAS: db_config_incomplete}
+    mock_create_user = mocker.patch.object(command, "_create_database_user")
+    mock_create_db = mocker.patch.object(command, "_create_database")
 
-    def validate_side_effect(alias, config):
-        return None
-
-    mock_validate = mocker.patch.object(command, "_validate_config", side_effect=validate_side_effect)
-    mock_user_exists = mocker.patch.object(command, "_user_exists")
-    mock_database_exists = mocker.patch.object(command, "_database_exists")
-
-    command._ensure_users_and_db(mock_admin_connection)
-
-    mock_validate.assert_called_once_with(DB_TEST_ALIAS, db_config_incomplete)
-    mock_user_exists.assert_not_called()
-    mock_database_exists.assert_not_called()
+    created = command._ensure_users_and_db(mock_admin_connection)
 
+    assert created == {}
+    mock_existing.assert_called_once_with(mocker.ANY, [], [])
+    mock_create_user.assert_not_called()
+    mock_create_db.assert_not_called()
 
-def test_ensure_users_and_db_user_creation_fails(command, mocker, mock_admin_connection, mock_psycopg_cursor, settings):
-    admin_user = "admin_user"
-    db_name_val = "fail_db"
-    db_user_val = "fail_user"
-    db_password_val = "fp"
-    db_config_dict = {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": db_name_val,
-        "USER": db_user_val,
-        "PASSWORD": db_password_val,
-    }
-    settings.DATABASES = {DB_TEST_ALIAS: db_config_dict}
 
-    mocker.patch.object(command, "_validate_config", return_value=(db_name_val, db_user_val, db_password_val))
-    mocker.patch.object(command, "_user_exists", return_value=False)
+def test_ensure_users_and_db_user_creation_fails(
+    command, mocker, mock_admin_connection, mock_psycopg_cursor, mock_existing, settings, db_config
+):
+    settings.DATABASES = {DB_TEST_ALIAS: db_config}
     mock_create_user = mocker.patch.object(command, "_create_database_user", side_effect=psycopg.ProgrammingError())
-    mock_database_exists = mocker.patch.object(command, "_database_exists")
-    mock_admin_connection.info.user = admin_user
+    mock_create_db = mocker.patch.object(command, "_create_database")
+    mock_admin_connection.info.user = "admin_user"
 
     with pytest.raises(psycopg.ProgrammingError):
         command._ensure_users_and_db(mock_admin_connection)
 
-    command._validate_config.assert_called_once_with(DB_TEST_ALIAS, db_config_dict)
-    command._user_exists.assert_called_once_with(mock_psycopg_cursor, db_user_val)
-    mock_create_user.assert_called_once_with(mock_psycopg_cursor, admin_user, DB_TEST_ALIAS, db_user_val, db_password_val)
-    mock_database_exists.assert_not_called()
+    mock_create_user.assert_called_once_with(
+        mock_psycopg_cursor, "admin_user", DB_TEST_ALIAS, "example_user", "example_password"
+    )
+    mock_create_db.assert_not_called()
+    mock_psycopg_cursor.close.assert_called_once()
 
 
 def test_ensure_users_and_db_creation_fails_owner_missing(
-    command, mock_admin_connection, mock_psycopg_cursor, settings, mocker
+    command, mock_admin_connection, mock_psycopg_cursor, mock_existing, settings, mocker, db_config
 ):
-    db_name_val = "ownerless_db"
-    db_user_val = "ghost_user"
-    db_password_val = "gp"
-    db_config_dict = {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": db_name_val,
-        "USER": db_user_val,
-        "PASSWORD": db_password_val,
-    }
-    settings.DATABASES = {DB_TEST_ALIAS: db_config_dict}
-
-    mocker.patch.object(command, "_validate_config", return_value=(db_name_val, db_user_val, db_password_val))
-    mocker.patch.object(command, "_user_exists", return_value=True)  # Initial user check is fine
+    settings.DATABASES = {DB_TEST_ALIAS: db_config}
+    mock_existing.return_value = ({"example_user"}, set())
     mock_create_user = mocker.patch.object(command, "_create_database_user")
-    mocker.patch.object(command, "_database_exists", return_value=False)  # DB needs creation
     mock_create_db = mocker.patch.object(command, "_create_database", side_effect=CommandError())
 
     with pytest.raises(CommandError):
         command._ensure_users_and_db(mock_admin_connection)
 
-    command._validate_config.assert_called_once_with(DB_TEST_ALIAS, db_config_dict)
-    command._user_exists.assert_called_once_with(mock_psycopg_cursor, db_user_val)
     mock_create_user.assert_not_called()
-    command._database_exists.assert_called_once_with(mock_psycopg_cursor, db_name_val)
-    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, db_name_val, db_user_val)
-
+    mock_create_db.assert_called_once_with(mock_psycopg_cursor, DB_TEST_ALIAS, "example_db", "example_user")
 
-def test_ensure_users_and_db_user_and_db_already_exist(command, mock_admin_connection, mock_psycopg_cursor, settings, mocker):
-    db_name_val = "existing_db"
-    db_user_val = "existing_user"
-    db_password_val = "existing_pass"
-    db_config_dict = {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": db_name_val,
-        "USER": db_user_val,
-        "PASSWORD": db_password_val,
-    }
-    settings.DATABASES = {DB_TEST_ALIAS: db_config_dict}
 
-    mocker.patch.object(command, "_validate_config", return_value=(db_name_val, db_user_val, db_password_val))
-    mocker.patch.object(command, "_user_exists", return_value=True)  # User exists
+def test_ensure_users_and_db_user_and_db_already_exist(
+    command, mock_admin_connection, mock_psycopg_cursor, mock_existing, settings, mocker, db_config
+):
+    settings.DATABASES = {DB_TEST_ALIAS: db_config}
+    mock_existing.return_value = ({"example_user"}, {"example_db"})
     mock_create_user = mocker.patch.object(command, "_create_database_user")
-    mocker.patch.object(command, "_database_exists", return_value=True)  # Database exists
     mock_create_db = mocker.patch.object(command, "_create_database")
 
-    command._ensure_users_and_db(mock_admin_connection)
+    created = command._ensure_users_and_db(mock_admin_connection)
 
-    command._validate_config.assert_called_once_with(DB_TEST_ALIAS, db_config_dict)
-    command._user_exists.assert_called_once_with(mock_psycopg_cursor, db_user_val)
+    assert created == {}
     mock_create_user.assert_not_called()
-    command._database_exists.assert_called_once_with(mock_psycopg_cursor, db_name_val)
     mock_create_db.assert_not_called()
 
-    command.stdout.write.assert_any_call(f"User found: {db_user_val}")
-    command.stdout.write.assert_any_call(f"Database found: {db_name_val}")
+    command.stdout.write.assert_any_call("User found: example_user")
+    command.stdout.write.assert_any_call("Database found: example_db")
     mock_psycopg_cursor.close.assert_called_once()
 
 
+@pytest.fixture
+def mock_fingerprint(command, mocker):
+    """Migrations run without a lock and without any stored fingerprint."""
+    mocker.patch.object(command, "_migration_lock", return_value=nullcontext())
+    mocker.patch.object(command, "_stored_fingerprint", return_value=None)
+    mocker.patch.object(command, "_store_fingerprint")
+    command._fingerprint = "fingerprint"
+    return command
+
+
+@pytest.mark.usefixtures("mock_fingerprint")
 def test_run_migrations_success(command, mock_call_command, settings):
     settings.DATABASES = {
         DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"}
     }
 
-    command._run_migrations()
+    assert command._run_migrations()
 
     mock_call_command.assert_called_once_with("migrate", database=DEFAULT_DB_ALIAS, interactive=False)
     command.stdout.write.assert_any_call(command.style.SUCCESS(f"Migrations complete for database: {DEFAULT_DB_ALIAS}"))
+    command._store_fingerprint.assert_called_once_with(DEFAULT_DB_ALIAS)
+
+
+def test_run_migrations_up_to_date(command, mock_fingerprint, mock_call_command, settings):
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"}
+    }
+    command._stored_fingerprint.return_value = "fingerprint"
+
+    assert not command._run_migrations()
+
+    mock_call_command.assert_not_called()
+    command._store_fingerprint.assert_not_called()
+    command.stdout.write.assert_any_call(f"Schema up to date for database: {DEFAULT_DB_ALIAS}, skipping migrations")
+
+
+def test_provision_holds_lock(command, mock_fingerprint, mock_call_command, mocker):
+    events = []
+    lock = command._migration_lock.return_value = mocker.MagicMock()
+    lock.__enter__.side_effect = lambda: events.append("acquire")
+    lock.__exit__.side_effect = lambda *exc_info: events.append("release")
+    mock_call_command.side_effect = lambda *args, **kwargs: events.append("migrate")
+
+    assert command._provision("db1", [DEFAULT_DB_ALIAS, "replica"], []) == 2
+
+    command._migration_lock.assert_called_once_with(DEFAULT_DB_ALIAS)
+    assert events == ["acquire", "migrate", "migrate", "release"]
+
+
+def test_migration_lock(command, mocker):
+    cursor = mocker.MagicMock()
+    mock_connections = mocker.patch("pems.core.management.commands.ensure_db.connections")
+    mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+
+    with command._migration_lock(DEFAULT_DB_ALIAS):
+        cursor.execute.assert_called_once_with("SELECT pg_advisory_lock(%s)", [MIGRATION_LOCK_ID])
+
+    cursor.execute.assert_called_with("SELECT pg_advisory_unlock(%s)", [MIGRATION_LOCK_ID])
+
+
+def test_migration_lock_released_on_error(command, mocker):
+    cursor = mocker.MagicMock()
+    mock_connections = mocker.patch("pems.core.management.commands.ensure_db.connections")
+    mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+
+    with pytest.raises(RuntimeError):
+        with command._migration_lock(DEFAULT_DB_ALIAS):
+            raise RuntimeError()
+
+    cursor.execute.assert_called_with("SELECT pg_advisory_unlock(%s)", [MIGRATION_LOCK_ID])
+
+
+def test_fingerprint(command, mock_os_environ, mocker):
+    fingerprint = command._fingerprint
+
+    assert len(fingerprint) == 64
+    assert Command()._fingerprint == fingerprint
+    # the superuser is ensured on every run, so it isn't part of the fingerprint
+    mock_os_environ["DJANGO_SUPERUSER_USERNAME"] = "other"
+    assert Command()._fingerprint == fingerprint
+
+    loader = mocker.patch("pems.core.management.commands.ensure_db.MigrationLoader")
+    loader.return_value.graph.nodes = [("districts", "9999_new")]
+    assert Command()._fingerprint != fingerprint
+
+
+def test_stored_fingerprint_missing_table(command, mocker):
+    cursor = mocker.MagicMock()
+    cursor.execute.side_effect = ProgrammingError('relation "pems_ensure_db" does not exist')
+    mock_connections = mocker.patch("pems.core.management.commands.ensure_db.connections")
+    mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+
+    assert command._stored_fingerprint(DEFAULT_DB_ALIAS) is None
 
 
+def test_stored_fingerprint(command, mocker):
+    cursor = mocker.MagicMock()
+    cursor.fetchone.return_value = ("stored",)
+    mock_connections = mocker.patch("pems.core.management.commands.ensure_db.connections")
+    mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+
+    assert command._stored_fingerprint(DEFAULT_DB_ALIAS) == "stored"
+    assert cursor.execute.call_args.args[1] == [DEFAULT_DB_ALIAS]
+
+
+def test_store_fingerprint(command, mocker):
+    cursor = mocker.MagicMock()
+    mock_connections = mocker.patch("pems.core.management.commands.ensure_db.connections")
+    mock_connections.__getitem__.return_value.cursor.return_value.__enter__.return_value = cursor
+    command._fingerprint = "fingerprint"
+
+    command._store_fingerprint(DEFAULT_DB_ALIAS)
+
+    assert cursor.execute.call_count == 2
+    assert cursor.execute.call_args.args[1] == [DEFAULT_DB_ALIAS, "fingerprint"]
+
+
+@pytest.mark.usefixtures("mock_fingerprint")
 def test_run_migrations_multiple_dbs(command, mock_call_command, settings):
     settings.DATABASES = {
         DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
@@ -599,6 +715,62 @@ def test_run_migrations_multiple_dbs(command, mock_call_command, settings):
     )
 
 
+@pytest.mark.usefixtures("mock_fingerprint")
+def test_run_migrations_grants_created(command, mock_call_command, settings, mocker):
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
+        "tasks_db": {"ENGINE": "django.db.backends.postgresql", "NAME": "tasks", "USER": "u2", "PASSWORD": "p2"},
+    }
+    mock_permissions = mocker.patch.object(command, "_ensure_schema_permissions")
+
+    command._run_migrations({"tasks": ["u2"]})
+
+    mock_permissions.assert_called_once_with("tasks", "u2")
+    assert mock_call_command.call_count == 2
+
+
+@pytest.mark.usefixtures("mock_fingerprint")
+def test_run_migrations_concurrent(command, settings, mocker):
+    """Different databases are migrated at the same time."""
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
+        "tasks_db": {"ENGINE": "django.db.backends.postgresql", "NAME": "tasks", "USER": "u2", "PASSWORD": "p2"},
+    }
+    barrier = threading.Barrier(2, timeout=5)
+    # each migration waits for the other to start, which would time out if they ran one after another
+    mocker.patch("pems.core.management.commands.ensure_db.call_command", side_effect=lambda *args, **kwargs: barrier.wait())
+
+    command._run_migrations()
+
+    command.stdout.write.assert_any_call(command.style.SUCCESS(f"Migrations complete for database: {DEFAULT_DB_ALIAS}"))
+    command.stdout.write.assert_any_call(command.style.SUCCESS("Migrations complete for database: tasks_db"))
+
+
+def test_run_migrations_same_database_in_turn(command, mock_call_command, settings, mocker):
+    config = {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"}
+    settings.DATABASES = {DEFAULT_DB_ALIAS: config, "replica": config}
+    mock_provision = mocker.patch.object(command, "_provision", return_value=2)
+
+    command._run_migrations()
+
+    mock_provision.assert_called_once_with("db1", [DEFAULT_DB_ALIAS, "replica"], [])
+
+
+@pytest.mark.usefixtures("mock_fingerprint")
+def test_run_migrations_failure_attempts_every_database(command, mock_call_command, settings):
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
+        "tasks_db": {"ENGINE": "django.db.backends.postgresql", "NAME": "tasks", "USER": "u2", "PASSWORD": "p2"},
+    }
+    mock_call_command.side_effect = [Exception("Migration critical failure!"), None]
+
+    with pytest.raises(CommandError, match="Migration failed for"):
+        command._run_migrations()
+
+    assert mock_call_command.call_count == 2
+
+
+@pytest.mark.usefixtures("mock_fingerprint")
 def test_run_migrations_failure_raises_commanderror(command, mock_call_command, settings):
     db_alias_fail = DEFAULT_DB_ALIAS
     settings.DATABASES = {
@@ -667,9 +839,12 @@ def test_add_arguments(command, mocker):
 
     command.add_arguments(mock_parser)
 
-    mock_parser.add_argument.assert_called_once_with(
+    mock_parser.add_argument.assert_any_call(
         "--reset", action="store_true", help="Completely reset the database(s) (DESTRUCTIVE)."
     )
+    mock_parser.add_argument.assert_any_call(
+        "--check", action="store_true", help="Only check that everything is in place, failing if anything isn't."
+    )
 
 
 @pytest.mark.parametrize("reset", [True, False])
@@ -684,7 +859,7 @@ def test_handle_success(command, mocker, mock_admin_connection, reset):
 
     command._admin_connection.assert_called_once()
     command._ensure_users_and_db.assert_called_once_with(mock_admin_connection)
-    command._run_migrations.assert_called_once()
+    command._run_migrations.assert_called_once_with(command._ensure_users_and_db.return_value)
     command._ensure_superuser.assert_called_once()
     assert mock_admin_connection.closed
     command.stdout.write.assert_any_call(command.style.SUCCESS("ensure_db command finished successfully."))
@@ -695,6 +870,18 @@ def test_handle_success(command, mocker, mock_admin_connection, reset):
         command._reset.assert_not_called()
 
 
+def test_handle_nothing_migrated_ensures_superuser(command, mocker, mock_admin_connection):
+    mocker.patch.object(command, "_admin_connection", return_value=mock_admin_connection)
+    mocker.patch.object(command, "_ensure_users_and_db")
+    mocker.patch.object(command, "_run_migrations", return_value=False)
+    mocker.patch.object(command, "_ensure_superuser")
+
+    command.handle(reset=False)
+
+    # an earlier run may have stored the fingerprint without creating the superuser
+    command._ensure_superuser.assert_called_once()
+
+
 def test_handle_admin_connection_fails(command, mocker):
     admin_connect_error_msg = "Admin connection totally failed"
     mocker.patch.object(command, "_admin_connection", side_effect=CommandError(admin_connect_error_msg))
@@ -722,3 +909,94 @@ def test_handle_run_migrations_fails(command, mock_admin_connection, mocker):
 
     command._ensure_superuser.assert_not_called()
     assert mock_admin_connection.closed
+
+
+@pytest.fixture
+def check_databases(settings):
+    settings.DATABASES = {
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.postgresql", "NAME": "db1", "USER": "u1", "PASSWORD": "p1"},
+        "tasks_db": {"ENGINE": "django.db.backends.postgresql", "NAME": "tasks", "USER": "u2", "PASSWORD": "p2"},
+    }
+
+
+@pytest.fixture
+def mock_unapplied(command, mocker):
+    return mocker.patch.object(command, "_has_unapplied_migrations", return_value=False)
+
+
+@pytest.fixture
+def mock_superuser_exists(command, mocker):
+    return mocker.patch.object(command, "_superuser_exists", return_value=True)
+
+
+@pytest.mark.usefixtures("check_databases")
+def test_check_ready(command, mock_admin_connection, mock_existing, mock_unapplied, mock_superuser_exists, mock_os_environ):
+    mock_existing.return_value = ({"u1", "u2"}, {"db1", "tasks"})
+    mock_os_environ["DJANGO_SUPERUSER_USERNAME"] = "admin"
+
+    assert command._check(mock_admin_connection) == []
+    mock_existing.assert_called_once()
+    mock_superuser_exists.assert_called_once_with("admin")
+
+
+@pytest.mark.usefixtures("check_databases")
+def test_check_missing(command, mock_admin_connection, mock_existing, mock_unapplied):
+    mock_existing.return_value = ({"u1"}, {"db1"})
+
+    missing = command._check(mock_admin_connection)
+
+    assert missing == ["User not found: u2", "Database not found: tasks"]
+    # migrations can't be checked on a database that doesn't exist
+    mock_unapplied.assert_not_called()
+
+
+@pytest.mark.usefixtures("check_databases", "mock_os_environ")
+def test_check_unapplied_migrations(command, mock_admin_connection, mock_existing, mock_unapplied):
+    mock_existing.return_value = ({"u1", "u2"}, {"db1", "tasks"})
+    mock_unapplied.side_effect = lambda db_alias: db_alias == "tasks_db"
+
+    assert command._check(mock_admin_connection) == ["Unapplied migrations for database: tasks_db"]
+
+
+@pytest.mark.usefixtures("check_databases")
+def test_check_superuser_missing(
+    command, mock_admin_connection, mock_existing, mock_unapplied, mock_superuser_exists, mock_os_environ
+):
+    mock_existing.return_value = ({"u1", "u2"}, {"db1", "tasks"})
+    mock_superuser_exists.return_value = False
+    mock_os_environ["DJANGO_SUPERUSER_USERNAME"] = "admin"
+
+    assert command._check(mock_admin_connection) == ["Superuser not found: admin"]
+
+
+def test_handle_check_ready(command, mocker, mock_admin_connection):
+    mocker.patch.object(command, "_admin_connection", return_value=mock_admin_connection)
+    mocker.patch.object(command, "_check", return_value=[])
+    mock_ensure_users_db = mocker.patch.object(command, "_ensure_users_and_db")
+    mock_migrations = mocker.patch.object(command, "_run_migrations")
+
+    command.handle(check=True)
+
+    command.stdout.write.assert_any_call(command.style.SUCCESS("Databases are ready."))
+    mock_ensure_users_db.assert_not_called()
+    mock_migrations.assert_not_called()
+    assert mock_admin_connection.closed
+
+
+def test_handle_check_not_ready(command, mocker, mock_admin_connection):
+    mocker.patch.object(command, "_admin_connection", return_value=mock_admin_connection)
+    mocker.patch.object(command, "_check", return_value=["Database not found: db1"])
+    mock_ensure_users_db = mocker.patch.object(command, "_ensure_users_and_db")
+
+    with pytest.raises(CommandError, match="Databases are not ready"):
+        command.handle(check=True)
+
+    command.stderr.write.assert_any_call("Database not found: db1")
+    mock_ensure_users_db.assert_not_called()
+    assert mock_admin_connection.closed
+
+
+@pytest.mark.django_db
+def test_has_unapplied_migrations(command):
+    # the test database is fully migrated
+    assert command._has_unapplied_migrations(DEFAULT_DB_ALIAS) is False
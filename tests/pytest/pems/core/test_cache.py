@@ -0,0 +1,60 @@
+import pytest
+from django.http import HttpResponse
+from django.views import View
+
+from pems.core.cache import CachedPageMixin
+
+
+class CountingView(CachedPageMixin, View):
+    calls = 0
+    version = "1"
+
+    def get_cache_version(self):
+        return self.version
+
+    def get(self, request):
+        CountingView.calls += 1
+        return HttpResponse(f"call {CountingView.calls}")
+
+
+@pytest.fixture
+def view(settings):
+    settings.PAGE_CACHE_SECONDS = 60
+    CountingView.calls = 0
+    CountingView.version = "1"
+    return CountingView.as_view()
+
+
+def test_cached(rf, view):
+    first = view(rf.get("/cached"))
+    second = view(rf.get("/cached"))
+
+    assert first.content == second.content == b"call 1"
+    assert CountingView.calls == 1
+    assert "max-age=60" in second["Cache-Control"]
+
+
+def test_cached_per_path(rf, view):
+    view(rf.get("/cached"))
+    view(rf.get("/cached/other"))
+
+    assert CountingView.calls == 2
+
+
+def test_new_version_is_not_cached(rf, view):
+    view(rf.get("/cached"))
+
+    CountingView.version = "2"
+    response = view(rf.get("/cached"))
+
+    assert response.content == b"call 2"
+
+
+def test_disabled(rf, view, settings):
+    settings.PAGE_CACHE_SECONDS = 0
+
+    view(rf.get("/cached"))
+    response = view(rf.get("/cached"))
+
+    assert response.content == b"call 2"
+    assert not response.has_header("Cache-Control")
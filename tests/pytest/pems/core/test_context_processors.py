@@ -1,5 +1,6 @@
 import pytest
-from pems.core.context_processors import streamlit
+from pems import __version__
+from pems.core.context_processors import pems_version, streamlit
 
 
 @pytest.mark.parametrize("url", ["http://sthost.gov", "http://localhost:8501"])
@@ -9,3 +10,19 @@ def test_streamlit(app_request, settings, url):
     context = streamlit(app_request)
 
     assert context["streamlit"]["url"] == url
+
+
+def test_streamlit_computed_once(app_request, rf):
+    """Test that the streamlit context is shared between requests, rather than built for each one."""
+    assert streamlit(app_request) is streamlit(rf.get("/another/path"))
+
+
+def test_streamlit_read_only(app_request):
+    context = streamlit(app_request)
+
+    with pytest.raises(TypeError):
+        context["streamlit"]["url"] = "http://changed"
+
+
+def test_pems_version(app_request):
+    assert pems_version(app_request) == {"pems_version": __version__}
@@ -0,0 +1,24 @@
+import pytest
+
+from pems.core.db import pool_stats
+
+
+@pytest.fixture
+def mock_connections(mocker):
+    return mocker.patch("pems.core.db.connections")
+
+
+def test_pool_stats(mocker, mock_connections):
+    pooled = mocker.Mock(alias="default")
+    pooled.pool.get_stats.return_value = {"pool_min": 1, "pool_max": 4, "pool_size": 2, "pool_available": 1}
+    unpooled = mocker.Mock(alias="other", pool=None)
+    sqlite = mocker.Mock(spec=["alias"], alias="sqlite")
+    mock_connections.all.return_value = [pooled, unpooled, sqlite]
+
+    assert pool_stats() == {"default": {"pool_min": 1, "pool_max": 4, "pool_size": 2, "pool_available": 1}}
+
+
+def test_pool_stats_none(mock_connections):
+    mock_connections.all.return_value = []
+
+    assert pool_stats() == {}
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from pems.core.health import Readiness, check_cache, check_database
+
+
+@pytest.fixture
+def checks(mocker):
+    return {"database": mocker.Mock(), "cache": mocker.Mock()}
+
+
+@pytest.fixture
+def mock_monotonic(mocker):
+    return mocker.patch("pems.core.health.time.monotonic", return_value=100.0)
+
+
+@pytest.mark.django_db
+def test_check_database():
+    check_database()
+
+
+def test_check_cache():
+    check_cache()
+
+
+def test_check_cache_unavailable(mocker):
+    mocker.patch("pems.core.health.caches", {"default": mocker.Mock(get=mocker.Mock(return_value=None))})
+
+    with pytest.raises(RuntimeError):
+        check_cache()
+
+
+def test_status_ready(checks, mock_monotonic):
+    assert Readiness(checks).status() == (True, {"database": "ok", "cache": "ok"})
+
+
+def test_status_not_ready(checks, mock_monotonic):
+    checks["database"].side_effect = ConnectionError()
+
+    assert Readiness(checks).status() == (False, {"database": "ConnectionError", "cache": "ok"})
+
+
+def test_status_cached(checks, mock_monotonic, settings):
+    settings.READINESS_TTL = 5
+    readiness = Readiness(checks)
+
+    readiness.status()
+    mock_monotonic.return_value = 104.9
+    readiness.status()
+
+    assert checks["database"].call_count == 1
+
+    mock_monotonic.return_value = 105.0
+    readiness.status()
+
+    assert checks["database"].call_count == 2
+
+
+def test_status_reset(checks, mock_monotonic):
+    readiness = Readiness(checks)
+
+    readiness.status()
+    readiness.reset()
+    readiness.status()
+
+    assert checks["database"].call_count == 2
+
+
+def test_status_expired_while_refreshing(checks, mock_monotonic, settings):
+    settings.READINESS_TTL = 5
+    readiness = Readiness(checks)
+    readiness.status()
+    checks["database"].side_effect = ConnectionError
+
+    mock_monotonic.return_value = 105.0
+    # another thread is refreshing the result
+    with readiness._lock:
+        assert readiness.status() == (True, {"database": "ok", "cache": "ok"})
+
+    assert checks["database"].call_count == 1
+    assert readiness.status() == (False, {"database": "ConnectionError", "cache": "ok"})
+    assert checks["database"].call_count == 2
+
+
+def test_status_first_waits(checks, mock_monotonic):
+    readiness = Readiness(checks)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_check():
+        started.set()
+        finish.wait(5)
+
+    checks["database"].side_effect = slow_check
+    first = threading.Thread(target=readiness.status)
+    first.start()
+    started.wait(5)
+
+    # with no result yet, a concurrent probe waits for the first one's checks rather than running them again
+    second = threading.Thread(target=readiness.status)
+    second.start()
+    second.join(0.1)
+    assert second.is_alive()
+
+    finish.set()
+    first.join(5)
+    second.join(5)
+    assert checks["database"].call_count == 1
@@ -0,0 +1,91 @@
+import pytest
+
+from pems.core.instrumentation import DURATION_BUCKETS, Metrics, Timings
+
+
+@pytest.fixture(autouse=True)
+def mock_pool_stats(mocker):
+    return mocker.patch("pems.core.instrumentation.pool_stats", return_value={})
+
+
+def test_timings_db():
+    timings = Timings()
+
+    def execute(sql, params, many, context):
+        return "result"
+
+    assert timings(execute, "SELECT 1", None, False, {}) == "result"
+    assert timings(execute, "SELECT 2", None, False, {}) == "result"
+
+    assert timings.db_queries == 2
+    assert timings.db > 0
+
+
+def test_timings_db_error():
+    timings = Timings()
+
+    def execute(sql, params, many, context):
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        timings(execute, "SELECT 1", None, False, {})
+
+    assert timings.db_queries == 1
+
+
+def test_timings_template():
+    timings = Timings()
+
+    assert timings.time_render(lambda: "rendered")() == "rendered"
+    assert timings.template > 0
+
+
+def test_timings_server_timing():
+    timings = Timings(total=0.25, db_queries=3, db=0.0125, template=0.1)
+
+    assert timings.server_timing() == 'db;dur=12.5;desc="3 queries", tpl;dur=100.0, total;dur=250.0'
+
+
+def test_metrics_histogram():
+    metrics = Metrics()
+    metrics.record("core:index", "GET", 200, Timings(total=0.03))
+    metrics.record("core:index", "GET", 200, Timings(total=20))
+
+    lines = metrics.render().splitlines()
+
+    labels = 'view="core:index",method="GET",status="200"'
+    assert f'pems_request_duration_seconds_bucket{{{labels},le="0.025"}} 0' in lines
+    assert f'pems_request_duration_seconds_bucket{{{labels},le="0.05"}} 1' in lines
+    assert f'pems_request_duration_seconds_bucket{{{labels},le="{DURATION_BUCKETS[-1]}"}} 1' in lines
+    assert f'pems_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"pems_request_duration_seconds_count{{{labels}}} 2" in lines
+
+
+def test_metrics_separate_series():
+    metrics = Metrics()
+    metrics.record("core:index", "GET", 200, Timings(total=0.1, db_queries=2))
+    metrics.record("core:index", "GET", 404, Timings(total=0.1, db_queries=1))
+
+    body = metrics.render()
+
+    assert 'pems_db_queries_total{view="core:index",method="GET",status="200"} 2' in body
+    assert 'pems_db_queries_total{view="core:index",method="GET",status="404"} 1' in body
+
+
+def test_metrics_reset():
+    metrics = Metrics()
+    metrics.record("core:index", "GET", 200, Timings(total=0.1))
+
+    metrics.reset()
+
+    assert "core:index" not in metrics.render()
+
+
+def test_metrics_pool(mock_pool_stats):
+    mock_pool_stats.return_value = {"default": {"pool_size": 3, "pool_available": 1}}
+
+    body = Metrics().render()
+
+    assert 'pems_db_pool_size{database="default"} 3' in body
+    assert 'pems_db_pool_available{database="default"} 1' in body
+    assert 'pems_db_requests_waiting{database="default"} 0' in body
@@ -1,6 +1,65 @@
-from pems.core.middleware import HEALTHCHECK_PATH
+from asgiref.sync import async_to_sync
+import pytest
+
+from pems.core.health import readiness
+from pems.core.middleware import HEALTHCHECK_PATH, READINESS_PATH
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    readiness.reset()
+    yield
+    readiness.reset()
 
 
 def test_healthcheck(client):
     response = client.get(HEALTHCHECK_PATH)
     assert response.status_code == 200
+
+
+def test_healthcheck_first(settings):
+    assert settings.MIDDLEWARE[0] == "pems.core.middleware.Healthcheck"
+
+
+def test_healthcheck_skips_middleware(client, settings):
+    # a probe by IP address isn't subject to host validation, or redirected to https
+    settings.ALLOWED_HOSTS = ["example.com"]
+    settings.SECURE_SSL_REDIRECT = True
+
+    response = client.get(HEALTHCHECK_PATH)
+
+    assert response.status_code == 200
+    assert response.content == b"Healthy"
+    assert "sessionid" not in response.cookies
+
+
+@pytest.mark.django_db
+def test_readiness(client):
+    response = client.get(READINESS_PATH)
+
+    assert response.status_code == 200
+    assert response.json() == {"database": "ok", "cache": "ok"}
+
+
+def test_readiness_not_ready(client, mocker):
+    mocker.patch.object(readiness, "status", return_value=(False, {"database": "OperationalError", "cache": "ok"}))
+
+    response = client.get(READINESS_PATH)
+
+    assert response.status_code == 503
+    assert response.json() == {"database": "OperationalError", "cache": "ok"}
+
+
+def test_healthcheck_asgi(async_client):
+    response = async_to_sync(async_client.get)(HEALTHCHECK_PATH)
+
+    assert response.status_code == 200
+    assert response.content == b"Healthy"
+
+
+@pytest.mark.django_db
+def test_readiness_asgi(async_client):
+    response = async_to_sync(async_client.get)(READINESS_PATH)
+
+    assert response.status_code == 200
+    assert response.json() == {"database": "ok", "cache": "ok"}
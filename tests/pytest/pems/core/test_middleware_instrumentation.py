@@ -0,0 +1,80 @@
+import json
+import logging
+
+import pytest
+from django.urls import reverse
+
+from pems.core.instrumentation import metrics
+from pems.core.middleware import METRICS_PATH
+
+
+@pytest.fixture(autouse=True)
+def instrumentation(settings):
+    settings.INSTRUMENTATION = True
+    settings.INSTRUMENTATION_METRICS_TOKEN = None
+    settings.PAGE_CACHE_SECONDS = 0
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.mark.django_db
+def test_server_timing(client, model_District):
+    response = client.get(reverse("districts:index"))
+
+    assert response.status_code == 200
+    timing = response["Server-Timing"]
+    assert "db;dur=" in timing
+    assert 'desc="1 queries"' in timing
+    assert "tpl;dur=" in timing
+    assert "total;dur=" in timing
+
+
+@pytest.mark.django_db
+def test_log_line(client, model_District, caplog):
+    with caplog.at_level(logging.INFO, logger="pems.core.middleware"):
+        client.get(reverse("districts:index"))
+
+    line = json.loads(caplog.records[-1].message)
+    assert line["view"] == "districts:index"
+    assert line["method"] == "GET"
+    assert line["status"] == 200
+    assert line["db_queries"] == 1
+    assert line["template_ms"] > 0
+
+
+@pytest.mark.django_db
+def test_metrics(client, model_District):
+    client.get(reverse("districts:index"))
+    client.get(reverse("districts:index"))
+    client.get("/not/a/page")
+
+    response = client.get(METRICS_PATH)
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert 'pems_request_duration_seconds_count{view="districts:index",method="GET",status="200"} 2' in body
+    # the district registry only queries on the first request
+    assert 'pems_db_queries_total{view="districts:index",method="GET",status="200"} 1' in body
+    assert 'pems_request_duration_seconds_count{view="unresolved",method="GET",status="404"} 1' in body
+
+
+@pytest.mark.parametrize("authorization,status", [(None, 403), ("Bearer wrong", 403), ("Bearer secret", 200)])
+def test_metrics_token(client, settings, authorization, status):
+    settings.INSTRUMENTATION_METRICS_TOKEN = "secret"
+    headers = {"Authorization": authorization} if authorization else {}
+
+    response = client.get(METRICS_PATH, headers=headers)
+
+    assert response.status_code == status
+
+
+@pytest.mark.django_db
+def test_disabled(client, settings, model_District):
+    settings.INSTRUMENTATION = False
+
+    response = client.get(reverse("districts:index"))
+
+    assert not response.has_header("Server-Timing")
+    assert client.get(METRICS_PATH).status_code == 404
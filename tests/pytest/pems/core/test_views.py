@@ -0,0 +1,27 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+
+@pytest.fixture
+def url():
+    return reverse("core:db_pool")
+
+
+@pytest.mark.django_db
+def test_db_pool_anonymous(client, url):
+    response = client.get(url)
+
+    # redirected to the admin login
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_db_pool_staff(client, mocker, url):
+    mocker.patch("pems.core.views.pool_stats", return_value={"default": {"pool_size": 2}})
+    client.force_login(User.objects.create_user("staff", is_staff=True))
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.json() == {"default": {"pool_size": 2}}
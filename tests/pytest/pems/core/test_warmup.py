@@ -0,0 +1,76 @@
+import pytest
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+from pems.core.warmup import TEMPLATE_DIRS, template_names, warm_if_enabled, warm_templates
+
+
+@pytest.fixture
+def template_dir(tmp_path, settings):
+    settings.TEMPLATES = [{**settings.TEMPLATES[0], "DIRS": [tmp_path]}]
+    return tmp_path
+
+
+def test_template_names():
+    names = template_names()
+
+    assert "core/base.html" in names
+    assert "districts/navigation.html" in names
+    assert "404.html" in names
+
+
+def test_template_dirs_exist():
+    assert all(dir.is_dir() for dir in TEMPLATE_DIRS)
+
+
+def test_warm_templates():
+    loaded = warm_templates()
+
+    assert loaded == template_names()
+
+
+def test_warm_templates_cached():
+    warm_templates()
+
+    loader = engines["django"].engine.template_loaders[0]
+    assert "districts/district.html" in {template.origin.template_name for template in loader.get_template_cache.values()}
+
+
+def test_warm_templates_references(template_dir):
+    (template_dir / "page.html").write_text(
+        '{% extends "core/base.html" %}{% block headline %}{% include "part.html" %}{% endblock %}'
+    )
+    (template_dir / "part.html").write_text("part")
+
+    loaded = warm_templates([template_dir])
+
+    assert loaded == ["core/base.html", "page.html", "part.html"]
+
+
+def test_warm_templates_syntax_error(template_dir):
+    (template_dir / "broken.html").write_text("{% if %}")
+
+    with pytest.raises(TemplateSyntaxError):
+        warm_templates([template_dir])
+
+
+def test_warm_templates_missing_include(template_dir):
+    (template_dir / "page.html").write_text('{% include "missing.html" %}')
+
+    with pytest.raises(TemplateDoesNotExist):
+        warm_templates([template_dir])
+
+
+def test_warm_if_enabled(settings, mocker):
+    settings.WARM_TEMPLATES = True
+    warm = mocker.patch("pems.core.warmup.warm_templates", return_value=["core/base.html"])
+
+    assert warm_if_enabled() == ["core/base.html"]
+    warm.assert_called_once_with()
+
+
+def test_warm_if_enabled_disabled(settings, mocker):
+    settings.WARM_TEMPLATES = False
+    warm = mocker.patch("pems.core.warmup.warm_templates")
+
+    assert warm_if_enabled() == []
+    warm.assert_not_called()
@@ -0,0 +1,141 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from pems.districts.management.commands.load_stations import FIELDS, Command
+from pems.districts.models import District, Station
+
+HEADER = "ID\tFwy\tDir\tDistrict\tCounty\tCity\tState_PM\tAbs_PM\tLatitude\tLongitude\tLength\tType\tLanes\tName\tUser_ID_1"
+ROWS = (
+    "715898\t5\tN\t7\t37\t40032\t.68\t117.313\t33.880069\t-118.021261\t.828\tML\t3\tPHOEBE\t2029",
+    "715900\t5\tS\t7\t37\t\t1.06\t117.63\t33.882892\t-118.026822\t\tOR\t1\tVALLEY VIEW\t3255",
+)
+
+
+def write_meta(directory, name, *rows):
+    path = directory / name
+    path.write_text("\n".join((HEADER, *rows)) + "\n")
+    return path
+
+
+@pytest.fixture
+def command(mocker):
+    cmd = Command()
+    cmd.stdout.write = mocker.MagicMock()
+    return cmd
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    write_meta(tmp_path, "d07_text_meta_2023_12_22.txt", *ROWS)
+    return tmp_path
+
+
+def test_meta_files_newest_per_district(command, tmp_path):
+    write_meta(tmp_path, "d07_text_meta_2023_01_01.txt")
+    newest = write_meta(tmp_path, "d07_text_meta_2023_12_22.txt")
+    other = write_meta(tmp_path, "d04_text_meta_2025_01_15.txt")
+    write_meta(tmp_path, "d04_text_meta_2025_01_15.csv")
+
+    assert command._meta_files([tmp_path]) == {"7": newest, "4": other}
+
+
+def test_meta_files_missing_path(command, tmp_path):
+    with pytest.raises(CommandError, match="No such file or directory"):
+        command._meta_files([tmp_path / "missing"])
+
+
+def test_rows(command, data_dir):
+    rows = list(command._rows(data_dir / "d07_text_meta_2023_12_22.txt", 3))
+
+    assert rows == [
+        (715898, 3, 5, "N", 37, 40032, ".68", 117.313, 33.880069, -118.021261, 0.828, "ML", 3, "PHOEBE"),
+        (715900, 3, 5, "S", 37, None, "1.06", 117.63, 33.882892, -118.026822, None, "OR", 1, "VALLEY VIEW"),
+    ]
+    assert all(len(row) == len(FIELDS) for row in rows)
+
+
+def test_rows_invalid(command, tmp_path):
+    path = write_meta(tmp_path, "d07_text_meta_2023_12_22.txt", "not-a-number\t5\tN")
+
+    with pytest.raises(CommandError, match="Invalid station on line 2 of d07_text_meta_2023_12_22.txt"):
+        list(command._rows(path, 1))
+
+
+def test_batches(command):
+    assert list(command._batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.django_db
+def test_handle_loads_stations(data_dir):
+    call_command("load_stations", str(data_dir), batch_size=1, stdout=None)
+
+    district = District.objects.get(number="7")
+    assert list(district.stations.order_by("id").values_list("id", "name", "city")) == [
+        (715898, "PHOEBE", 40032),
+        (715900, "VALLEY VIEW", None),
+    ]
+
+
+@pytest.mark.django_db
+def test_handle_upserts(data_dir, model_District):
+    call_command("load_stations", str(data_dir))
+    write_meta(data_dir, "d07_text_meta_2024_01_01.txt", ROWS[0].replace("PHOEBE", "RENAMED"))
+
+    call_command("load_stations", str(data_dir))
+
+    assert Station.objects.count() == 2
+    station = Station.objects.get(id=715898)
+    assert station.name == "RENAMED"
+    assert station.updated_at > Station.objects.get(id=715900).updated_at
+
+
+@pytest.mark.django_db
+def test_handle_district(data_dir):
+    write_meta(data_dir, "d04_text_meta_2025_01_15.txt", ROWS[0].replace("715898", "400001"))
+
+    call_command("load_stations", str(data_dir), district="04")
+
+    assert list(Station.objects.values_list("id", flat=True)) == [400001]
+    assert not District.objects.filter(number="7").exists()
+
+
+@pytest.mark.django_db
+def test_handle_no_files(tmp_path):
+    with pytest.raises(CommandError, match="No station metadata files found."):
+        call_command("load_stations", str(tmp_path))
+
+
+def test_copy(command, mocker):
+    cursor = mocker.MagicMock()
+    cursor.rowcount = 1
+    connection = mocker.MagicMock()
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    connection.cursor.return_value.__enter__.return_value = cursor
+    mocker.patch("pems.districts.management.commands.load_stations.connections", {DEFAULT_DB_ALIAS: connection})
+    copy = cursor.copy.return_value.__enter__.return_value
+    rows = [(i,) + (None,) * (len(FIELDS) - 1) for i in range(3)]
+
+    assert command._copy(DEFAULT_DB_ALIAS, rows, 2) == 2
+
+    assert cursor.copy.call_count == 2
+    assert copy.write_row.call_count == 3
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert statements[0].startswith('CREATE TEMPORARY TABLE "load_stations" (LIKE "districts_station"')
+    assert "ON CONFLICT (id) DO UPDATE" in statements[1]
+    assert "IS DISTINCT FROM" in statements[1]
+    assert '"updated_at" = now()' in statements[1]
+    assert statements[-1] == 'DROP TABLE "load_stations"'
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="COPY is only used on PostgreSQL")
+def test_handle_copy_postgresql(data_dir):
+    # the test runs in a transaction, so each district's atomic block is a savepoint, as under ATOMIC_REQUESTS
+    write_meta(data_dir, "d04_text_meta_2025_01_15.txt", ROWS[0].replace("715898", "400001"))
+
+    call_command("load_stations", str(data_dir))
+    call_command("load_stations", str(data_dir))
+
+    assert sorted(Station.objects.values_list("id", "district__number")) == [(400001, "4"), (715898, "7"), (715900, "7")]
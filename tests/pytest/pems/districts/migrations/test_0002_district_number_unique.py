@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+BEFORE = [("districts", "0001_initial")]
+AFTER = [("districts", "0002_district_number_unique")]
+
+
+@pytest.fixture
+def migrate():
+    def migrate(targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    yield migrate
+    # leave the schema as the other tests expect it
+    migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_normalizes_numbers(migrate):
+    District = migrate(BEFORE).get_model("districts", "District")
+    District.objects.create(number=" 07", name="Los Angeles / Ventura")
+    District.objects.create(number="", name="Blank")
+
+    District = migrate(AFTER).get_model("districts", "District")
+
+    assert sorted(District.objects.values_list("number", flat=True)) == ["0", "7"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_conflicting_numbers(migrate):
+    District = migrate(BEFORE).get_model("districts", "District")
+    first = District.objects.create(number="07", name="Los Angeles")
+    second = District.objects.create(number="7", name="Ventura")
+    District.objects.create(number="4", name="Oakland")
+
+    with pytest.raises(RuntimeError, match=f"7: pk={first.pk} number='07' name='Los Angeles', pk={second.pk} number='7'"):
+        migrate(AFTER)
+
+    # nothing was renumbered
+    assert sorted(District.objects.values_list("number", flat=True)) == ["07", "4", "7"]
+    # resolved, so the schema can be migrated forward again
+    second.delete()
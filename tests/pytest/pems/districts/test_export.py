@@ -0,0 +1,44 @@
+import io
+
+from asgiref.sync import async_to_sync
+import pyarrow.parquet as pq
+
+from pems.districts import export
+
+FIELDS = ("id", "name")
+TYPES = {"id": "int32", "name": "string"}
+ROWS = [(1, "A"), (2, None), (3, "C")]
+
+
+def test_stream_csv():
+    chunks = list(export.stream(export.CsvEncoder(FIELDS), ROWS, 2))
+
+    assert chunks == [b"id,name\r\n1,A\r\n2,\r\n", b"3,C\r\n", b""]
+
+
+def test_stream_parquet_row_groups():
+    chunks = list(export.stream(export.ParquetEncoder(FIELDS, TYPES), ROWS, 2))
+
+    # a row group per chunk, sent as it is written, then the footer
+    assert len(chunks) == 3
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.num_row_groups == 2
+    assert parquet.read().to_pylist() == [{"id": 1, "name": "A"}, {"id": 2, "name": None}, {"id": 3, "name": "C"}]
+
+
+def test_stream_parquet_empty():
+    table = pq.read_table(io.BytesIO(b"".join(export.stream(export.ParquetEncoder(FIELDS, TYPES), []))))
+
+    assert table.num_rows == 0
+    assert table.column_names == list(FIELDS)
+
+
+def test_astream():
+    async def rows():
+        for row in ROWS:
+            yield row
+
+    async def chunks():
+        return [chunk async for chunk in export.astream(export.CsvEncoder(FIELDS), rows(), 2)]
+
+    assert async_to_sync(chunks)() == list(export.stream(export.CsvEncoder(FIELDS), ROWS, 2))
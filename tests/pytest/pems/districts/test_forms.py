@@ -0,0 +1,32 @@
+import pytest
+
+from pems.districts.forms import StationPageForm, StationQueryForm
+from pems.districts.models import Station
+
+
+def test_StationQueryForm_filter():
+    form = StationQueryForm({"freeway": "5", "type": "ml", "direction": "", "min_latitude": "33.5"})
+    assert form.is_valid()
+
+    where = str(form.filter(Station.objects.all()).query).split(" WHERE ")[1]
+
+    assert '"freeway" = 5' in where
+    assert '"type" = ML' in where
+    assert '"latitude" >= 33.5' in where
+    assert '"direction"' not in where
+    assert where.endswith('ORDER BY "districts_station"."id" ASC')
+
+
+@pytest.mark.parametrize("limit,expected", [("", StationPageForm.DEFAULT_LIMIT), ("10", 10)])
+def test_StationPageForm_limit(limit, expected):
+    form = StationPageForm({"limit": limit})
+    assert form.is_valid()
+
+    assert form.cleaned_data["limit"] == expected
+
+
+def test_StationPageForm_after():
+    form = StationPageForm({"after": "715898"})
+    assert form.is_valid()
+
+    assert '"id" > 715898' in str(form.filter(Station.objects.all()).query)
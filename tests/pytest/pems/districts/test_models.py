@@ -1,6 +1,35 @@
 import pytest
+from django.db import IntegrityError
+
+from pems.districts.models import District, Station
 
 
 @pytest.mark.django_db
 def test_District_str(model_District):
     assert str(model_District) == "1 - Eureka"
+
+
+@pytest.mark.parametrize("number,expected", [("7", "7"), (" 7 ", "7"), ("07", "7"), (7, "7"), ("12", "12"), ("0", "0")])
+def test_District_normalize_number(number, expected):
+    assert District.normalize_number(number) == expected
+
+
+@pytest.mark.django_db
+def test_District_save_normalizes_number():
+    district = District.objects.create(number=" 07", name="Los Angeles / Ventura")
+
+    district.refresh_from_db()
+    assert district.number == "7"
+
+
+@pytest.mark.django_db
+def test_District_number_unique(model_District):
+    with pytest.raises(IntegrityError):
+        District.objects.create(number="01", name="Duplicate")
+
+
+@pytest.mark.django_db
+def test_Station_str(model_District):
+    station = Station.objects.create(id=715898, district=model_District, freeway=5, direction="N", type="ML", name="PHOEBE")
+
+    assert str(station) == "715898 - PHOEBE"
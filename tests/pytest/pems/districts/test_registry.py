@@ -0,0 +1,154 @@
+from asgiref.sync import async_to_sync
+import pytest
+
+from pems.districts.models import District
+from pems.districts.registry import VERSION_KEY, DistrictRegistry
+
+
+@pytest.fixture
+def registry():
+    return DistrictRegistry()
+
+
+@pytest.fixture
+def shared_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-registry"},
+    }
+    settings.DISTRICTS_REGISTRY_CACHE = "default"
+
+    from django.core.cache import caches
+
+    caches["default"].clear()
+    return caches["default"]
+
+
+@pytest.mark.django_db
+def test_all(registry, model_District):
+    assert registry.all() == (model_District,)
+
+
+@pytest.mark.django_db
+def test_all_is_cached(registry, model_District, django_assert_num_queries):
+    registry.all()
+
+    with django_assert_num_queries(0):
+        assert registry.all() == (model_District,)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("number", ["1", "01", 1, " 1"])
+def test_get(registry, model_District, number):
+    assert registry.get(number) == model_District
+
+
+@pytest.mark.django_db
+def test_get_not_found(registry, model_District):
+    assert registry.get("2") is None
+
+
+@pytest.mark.django_db
+def test_invalidate(registry, model_District, django_assert_num_queries):
+    registry.all()
+    version = registry.version
+
+    registry.invalidate()
+
+    assert registry.version != version
+    with django_assert_num_queries(1):
+        registry.all()
+
+
+@pytest.mark.django_db
+def test_save_invalidates(model_District):
+    from pems.districts.registry import registry
+
+    assert registry.all() == (model_District,)
+
+    model_District.name = "Updated"
+    model_District.save()
+    new_district = District.objects.create(number="2", name="Redding")
+
+    districts = registry.all()
+    assert [d.name for d in districts] == ["Updated", "Redding"]
+    assert new_district in districts
+
+
+@pytest.mark.django_db
+def test_delete_invalidates(model_District):
+    from pems.districts.registry import registry
+
+    assert registry.all() == (model_District,)
+
+    model_District.delete()
+
+    assert registry.all() == ()
+
+
+@pytest.mark.django_db
+def test_shared_cache_invalidates_other_processes(shared_cache, model_District, django_assert_num_queries):
+    # two registries stand in for two processes sharing a cache
+    registry, other = DistrictRegistry(), DistrictRegistry()
+    registry.all()
+    other.all()
+
+    registry.invalidate()
+
+    assert shared_cache.get(VERSION_KEY) == registry.version == other.version
+    with django_assert_num_queries(1):
+        other.all()
+    with django_assert_num_queries(0):
+        other.all()
+
+
+@pytest.mark.django_db
+def test_aall(registry, model_District):
+    assert async_to_sync(registry.aall)() == (model_District,)
+
+
+@pytest.mark.django_db
+def test_aall_shares_state(registry, model_District, django_assert_num_queries):
+    async_to_sync(registry.aall)()
+
+    with django_assert_num_queries(0):
+        assert registry.all() == (model_District,)
+
+
+@pytest.mark.django_db
+def test_aget(registry, model_District):
+    assert async_to_sync(registry.aget)("01") == model_District
+    assert async_to_sync(registry.aget)("2") is None
+
+
+@pytest.mark.django_db
+def test_version_unique_per_process(model_District):
+    # without a shared cache, two processes (or one process before and after a restart) never share a version
+    registry, other = DistrictRegistry(), DistrictRegistry()
+
+    assert registry.version != other.version
+
+
+@pytest.mark.django_db
+def test_version_expires(registry, model_District, settings, mocker, django_assert_num_queries):
+    settings.DISTRICTS_REGISTRY_TTL = 60
+    monotonic = mocker.patch("pems.districts.registry.time.monotonic", return_value=1000.0)
+    registry.all()
+    version = registry.version
+
+    monotonic.return_value = 1061.0
+
+    # another process's change is loaded once the TTL has passed
+    assert registry.version != version
+    with django_assert_num_queries(1):
+        registry.all()
+
+
+@pytest.mark.django_db
+def test_version_never_expires(registry, model_District, settings, mocker):
+    settings.DISTRICTS_REGISTRY_TTL = 0
+    monotonic = mocker.patch("pems.districts.registry.time.monotonic", return_value=1000.0)
+    version = registry.version
+
+    monotonic.return_value = 10**9
+
+    assert registry.version == version
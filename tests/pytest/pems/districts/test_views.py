@@ -1,7 +1,17 @@
+import io
+from urllib.parse import urlencode
+import warnings
+
+from asgiref.sync import async_to_sync
+import pyarrow.parquet as pq
 import pytest
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.http import Http404
+from django.urls import reverse
 
 from pems.districts import views
-from pems.districts.models import District
+from pems.districts.models import District, Station
 
 
 class TestIndexView:
@@ -22,6 +32,9 @@ class TestIndexView:
     def test_template_name(self, view):
         assert view.template_name == "districts/index.html"
 
+    def test_async(self):
+        assert views.IndexView.view_is_async
+
 
 class TestDistrictView:
 
@@ -34,3 +47,324 @@ class TestDistrictView:
         found_object = view.get_object()
 
         assert found_object == model_District
+
+    @pytest.mark.django_db
+    def test_get_object_not_found(self, app_request, model_District):
+        view = views.DistrictView()
+        view.setup(app_request, district_number="2")
+
+        with pytest.raises(Http404):
+            view.get_object()
+
+    @pytest.mark.django_db
+    def test_aget_object(self, app_request, model_District):
+        view = views.DistrictView()
+        view.setup(app_request, district_number=model_District.number)
+
+        assert async_to_sync(view.aget_object)() == model_District
+
+    @pytest.mark.django_db
+    def test_aget_object_not_found(self, app_request, model_District):
+        view = views.DistrictView()
+        view.setup(app_request, district_number="2")
+
+        with pytest.raises(Http404):
+            async_to_sync(view.aget_object)()
+
+    def test_async(self):
+        assert views.DistrictView.view_is_async
+
+    @pytest.mark.django_db
+    def test_district_not_found(self, client, model_District):
+        response = client.get(reverse("districts:district", args=["2"]))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url,first_queries,cached_queries",
+    [
+        # the navigation queries districts once, then comes from the registry
+        (reverse("districts:index"), 1, 0),
+        # the district itself also comes from the registry
+        (reverse("districts:district", args=["1"]), 1, 0),
+    ],
+)
+def test_navigation_queries(client, model_District, django_assert_num_queries, url, first_queries, cached_queries):
+    with django_assert_num_queries(first_queries):
+        assert client.get(url).status_code == 200
+
+    with django_assert_num_queries(cached_queries):
+        assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [reverse("districts:index"), reverse("districts:district", args=["1"])])
+def test_page_cached(client, model_District, url):
+    assert client.get(url).templates
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    # served from the cache without rendering
+    assert not response.templates
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [reverse("districts:index"), reverse("districts:district", args=["1"])])
+def test_page_cache_invalidated_by_district_change(client, model_District, url):
+    client.get(url)
+
+    District.objects.create(number="2", name="Redding")
+    response = client.get(url)
+
+    assert response.templates
+    assert reverse("districts:district", args=["2"]) in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_navigation_fragment_cached(client, model_District, settings):
+    settings.PAGE_CACHE_SECONDS = 0
+    client.get(reverse("districts:index"))
+
+    # rename the district without invalidating the registry: the cached navigation still shows it as before
+    District.objects.filter(pk=model_District.pk).update(number="3")
+    response = client.get(reverse("districts:index"))
+
+    assert reverse("districts:district", args=["1"]) in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_navigation_fragment_expires(client, model_District, settings, mocker):
+    settings.PAGE_CACHE_SECONDS = 0
+    settings.FRAGMENT_CACHE_SECONDS = 123
+    spy = mocker.spy(caches["default"], "set")
+
+    client.get(reverse("districts:index"))
+
+    call = next(call for call in spy.call_args_list if "districts-navigation" in call.args[0])
+    assert call.args[2] == 123
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cache_seconds", [0, 60])
+@pytest.mark.parametrize("url", [reverse("districts:index"), reverse("districts:district", args=["1"])])
+def test_asgi(async_client, model_District, settings, cache_seconds, url):
+    settings.PAGE_CACHE_SECONDS = cache_seconds
+
+    response = async_to_sync(async_client.get)(url)
+
+    assert response.status_code == 200
+    assert reverse("districts:district", args=["1"]) in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_asgi_not_found(async_client, model_District):
+    response = async_to_sync(async_client.get)(reverse("districts:district", args=["2"]))
+
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def stations(model_District):
+    return Station.objects.bulk_create(
+        [
+            Station(id=101, district=model_District, freeway=5, direction="N", type="ML", latitude=33.9, longitude=-118.0),
+            Station(id=102, district=model_District, freeway=5, direction="S", type="OR", latitude=34.1, longitude=-118.2),
+            Station(id=103, district=model_District, freeway=405, direction="N", type="ML", latitude=34.0, longitude=-118.4),
+        ]
+    )
+
+
+def stations_url(district="1", **params):
+    query = f"?{urlencode(params)}" if params else ""
+    return reverse("districts:stations", args=[district]) + query
+
+
+@pytest.mark.django_db
+class TestStationsView:
+    def test_async(self):
+        assert views.StationsView.view_is_async
+
+    @pytest.mark.usefixtures("stations")
+    def test_all(self, client):
+        response = client.get(stations_url())
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["district"] == "1"
+        assert [station["id"] for station in data["stations"]] == [101, 102, 103]
+        assert set(data["stations"][0]) == set(views.STATION_FIELDS)
+        assert data["next"] is None
+
+    @pytest.mark.usefixtures("stations")
+    @pytest.mark.parametrize(
+        "params,expected",
+        [
+            ({"freeway": 5}, [101, 102]),
+            ({"freeway": 5, "direction": "n"}, [101]),
+            ({"type": "ML"}, [101, 103]),
+            ({"min_latitude": 34, "max_longitude": -118.1}, [102, 103]),
+            ({"freeway": 10}, []),
+        ],
+    )
+    def test_filter(self, client, params, expected):
+        response = client.get(stations_url(**params))
+
+        assert [station["id"] for station in response.json()["stations"]] == expected
+
+    @pytest.mark.usefixtures("stations")
+    def test_keyset_pagination(self, client):
+        first = client.get(stations_url(type="ML", limit=1)).json()
+
+        assert [station["id"] for station in first["stations"]] == [101]
+        assert first["next"] == stations_url(type="ML", limit=1, after=101)
+
+        second = client.get(first["next"]).json()
+
+        assert [station["id"] for station in second["stations"]] == [103]
+        assert second["next"] is None
+
+    @pytest.mark.usefixtures("stations")
+    def test_page_query(self, client, django_assert_num_queries):
+        client.get(stations_url())
+
+        # the district comes from the registry, a page is a single query
+        with django_assert_num_queries(1):
+            client.get(stations_url(limit=2))
+
+    @pytest.mark.parametrize("params", [{"limit": 0}, {"limit": 1001}, {"freeway": "five"}, {"min_latitude": 91}])
+    def test_invalid(self, client, model_District, params):
+        response = client.get(stations_url(**params))
+
+        assert response.status_code == 400
+        assert set(response.json()["errors"]) == set(params)
+
+    def test_district_not_found(self, client, model_District):
+        response = client.get(stations_url("2"))
+
+        assert response.status_code == 404
+
+    @pytest.mark.usefixtures("stations")
+    def test_asgi(self, async_client):
+        response = async_to_sync(async_client.get)(stations_url(freeway=405))
+
+        assert response.status_code == 200
+        assert [station["id"] for station in response.json()["stations"]] == [103]
+
+
+def export_url(district="1", **params):
+    query = f"?{urlencode(params)}" if params else ""
+    return reverse("districts:stations_export", args=[district]) + query
+
+
+@pytest.mark.django_db
+class TestStationsExportView:
+    def test_async(self):
+        assert views.StationsExportView.view_is_async
+
+    @pytest.mark.usefixtures("stations")
+    def test_csv(self, client):
+        response = client.get(export_url(freeway=5))
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert response["Content-Disposition"] == 'attachment; filename="district-1-stations.csv"'
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        assert lines[0] == ",".join(views.STATION_FIELDS)
+        assert [line.split(",")[0] for line in lines[1:]] == ["101", "102"]
+
+    @pytest.mark.usefixtures("stations")
+    def test_parquet(self, client):
+        response = client.get(export_url(format="parquet", type="ML"))
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/vnd.apache.parquet"
+        table = pq.read_table(io.BytesIO(b"".join(response.streaming_content)))
+        assert table.column_names == list(views.STATION_FIELDS)
+        assert table.column("id").to_pylist() == [101, 103]
+
+    @pytest.mark.usefixtures("stations")
+    def test_chunked(self, client, mocker):
+        mocker.patch("pems.districts.export.CHUNK_SIZE", 1)
+        mock_iterator = mocker.spy(QuerySet, "iterator")
+
+        response = client.get(export_url())
+
+        # a chunk per row, the first with the header, then the (empty) end
+        assert len(list(response.streaming_content)) == 4
+        assert mock_iterator.call_args.kwargs == {"chunk_size": 1}
+
+    def test_empty(self, client, model_District):
+        response = client.get(export_url())
+
+        assert response.status_code == 200
+        assert b"".join(response.streaming_content).decode().splitlines() == [",".join(views.STATION_FIELDS)]
+
+    @pytest.mark.usefixtures("stations")
+    def test_etag_not_modified(self, client):
+        etag = client.get(export_url())["ETag"]
+
+        response = client.get(export_url(), headers={"if-none-match": etag})
+
+        assert response.status_code == 304
+
+    @pytest.mark.usefixtures("stations")
+    @pytest.mark.parametrize("params", [{"format": "parquet"}, {"freeway": 5}])
+    def test_etag_varies_by_query(self, client, params):
+        assert client.get(export_url())["ETag"] != client.get(export_url(**params))["ETag"]
+
+    def test_etag_changes_with_stations(self, client, stations):
+        etag = client.get(export_url())["ETag"]
+
+        stations[0].name = "RENAMED"
+        stations[0].save()
+
+        response = client.get(export_url(), headers={"if-none-match": etag})
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+        stations[1].delete()
+
+        response = client.get(export_url(), headers={"if-none-match": response["ETag"]})
+        assert response.status_code == 200
+
+    def test_deletion_not_modified_since(self, client, stations):
+        response = client.get(export_url())
+        assert "Last-Modified" not in response
+
+        stations[2].delete()
+
+        # a client revalidating by date alone gets the changed export, rather than a stale 304
+        response = client.get(export_url(), headers={"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        assert response.status_code == 200
+        assert len(b"".join(response.streaming_content).decode().splitlines()) == 3
+
+    def test_invalid(self, client, model_District):
+        response = client.get(export_url(format="xlsx"))
+
+        assert response.status_code == 400
+        assert set(response.json()["errors"]) == {"format"}
+
+    def test_district_not_found(self, client, model_District):
+        assert client.get(export_url("2")).status_code == 404
+
+    @pytest.mark.usefixtures("stations")
+    @pytest.mark.parametrize("fmt", ["csv", "parquet"])
+    def test_asgi(self, async_client, fmt):
+        async def get():
+            response = await async_client.get(export_url(format=fmt, freeway=405))
+            return response, b"".join([chunk async for chunk in response.streaming_content])
+
+        with warnings.catch_warnings():
+            # consuming a synchronous iterator under ASGI would read every row into memory first
+            warnings.simplefilter("error")
+            response, content = async_to_sync(get)()
+
+        assert response.status_code == 200
+        if fmt == "csv":
+            assert content.decode().splitlines()[1].startswith("103,")
+        else:
+            assert pq.read_table(io.BytesIO(content)).column("id").to_pylist() == [103]
@@ -0,0 +1,6 @@
+def test_application(settings):
+    settings.WARM_TEMPLATES = False
+
+    from pems.asgi import application
+
+    assert callable(application)
@@ -6,3 +6,9 @@ DATABASES = {
         "NAME": "test",
     }
 }
+
+# render pages without requiring collectstatic's manifest
+STORAGES = {
+    **STORAGES,  # noqa: F405
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
@@ -0,0 +1,58 @@
+import pytest
+
+META_COLUMNS = [
+    "ID",
+    "Fwy",
+    "Dir",
+    "District",
+    "County",
+    "City",
+    "State_PM",
+    "Abs_PM",
+    "Latitude",
+    "Longitude",
+    "Length",
+    "Type",
+    "Lanes",
+    "Name",
+    "User_ID_1",
+]
+META_HEADER = "\t".join(META_COLUMNS)
+
+
+def _meta_row(id, fwy, dir, district, lat, lon, length, type):
+    return f"{id}\t{fwy}\t{dir}\t{district}\t1\t2\t1.5\t10.0\t{lat}\t{lon}\t{length}\t{type}\t3\tStation {id}\tDT{id}"
+
+
+@pytest.fixture
+def meta_rows():
+    return {
+        "d04_text_meta_2024_06_01.txt": [
+            _meta_row(400000, 101, "S", 4, 38.08, -122.54, 0.5, "ML"),
+        ],
+        "d04_text_meta_2025_01_15.txt": [
+            _meta_row(400000, 101, "S", 4, 38.08, -122.54, 0.5, "ML"),
+            _meta_row(400001, 101, "N", 4, 37.36, -121.90, 0.25, "ML"),
+            _meta_row(400002, 880, "N", 4, "", "", 1.0, "OR"),
+        ],
+        "d07_text_meta_2023_12_22.txt": [
+            _meta_row(700000, 5, "S", 7, 34.05, -118.24, 1.5, "ML"),
+            _meta_row(700001, 405, "N", 7, 33.90, -118.39, 0.75, "HV"),
+        ],
+    }
+
+
+@pytest.fixture
+def data_dir(tmp_path, meta_rows):
+    """A directory of station metadata files in the district text_meta format."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for name, rows in meta_rows.items():
+        (data_dir / name).write_text("\n".join([META_HEADER, *rows]) + "\n")
+    (data_dir / "app_stations.py").write_text("")
+    return data_dir
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit_app.stations.aggregates import StationCube
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "District": [4, 4, 4, 7, 7, 7],
+            "Fwy": pd.Categorical([5, 101, 5, 5, 405, 5]),
+            "Dir": pd.Categorical(["N", "S", "N", "S", "N", None]),
+            "Type": pd.Categorical(["ML", "ML", "ML", "ML", "HV", "ML"]),
+            "Length": np.array([0.5, 1.0, np.nan, 2.0, 0.25, 1.5], dtype=np.float32),
+        }
+    )
+
+
+@pytest.fixture
+def cube(df):
+    return StationCube(df)
+
+
+def test_frame(df, cube):
+    assert cube.frame.columns.tolist() == ["District", "Fwy", "Dir", "Type", "count", "length"]
+    assert len(cube.frame) < len(df)
+    assert cube.frame["count"].sum() == len(df)
+
+
+@pytest.mark.parametrize(
+    "selections",
+    [
+        {},
+        {"Fwy": 5},
+        {"Fwy": 5, "Dir": "N"},
+        {"District": 7, "Type": "ML"},
+        {"Type": "OR"},
+        {"Fwy": 5, "Dir": None, "Type": "ML"},
+        {"Fwy": 10},
+    ],
+)
+def test_summary_matches_scan(df, cube, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in selections.items():
+        if value is not None:
+            mask &= (df[column] == value).to_numpy()
+
+    count, length = cube.summary(**selections)
+
+    assert count == mask.sum()
+    assert length == pytest.approx(df[mask]["Length"].sum())
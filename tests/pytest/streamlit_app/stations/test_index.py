@@ -0,0 +1,180 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit_app.stations.index import StationIndex, intersect
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "ID": [1, 2, 3, 4, 5, 6],
+            "Fwy": [5, 101, 5, 405, 5, 101],
+            "Dir": ["N", "S", "S", "N", "N", None],
+            "Type": ["ML", "ML", "OR", "ML", "HV", "ML"],
+        }
+    )
+
+
+@pytest.fixture
+def index(df):
+    return StationIndex(df)
+
+
+def test_options(df, index):
+    for column in ("ID", "Fwy", "Dir", "Type"):
+        assert index.options[column] == sorted(df[column].dropna().unique().tolist())
+
+
+def test_codes(df, index):
+    assert len(index.codes["Fwy"]) == len(df)
+    # missing values are not coded
+    assert index.codes["Dir"][5] == -1
+
+
+def test_positions_are_sorted(index):
+    for positions in index.positions["Fwy"].values():
+        assert np.all(np.diff(positions) > 0)
+
+
+def test_select_all(df, index):
+    assert index.select().tolist() == list(range(len(df)))
+    assert index.select(ID=None, Fwy=None, Dir=None, Type=None).tolist() == list(range(len(df)))
+
+
+@pytest.mark.parametrize(
+    "selections",
+    [
+        {"Fwy": 5},
+        {"Fwy": 5, "Dir": "N"},
+        {"Fwy": 5, "Dir": "N", "Type": "ML"},
+        {"Fwy": 101, "Type": "ML"},
+        {"ID": 3, "Fwy": 5},
+        {"ID": 3, "Fwy": 101},
+        {"Fwy": 10},
+        {"Dir": "S", "Type": None},
+    ],
+)
+def test_select_matches_mask(df, index, selections):
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in selections.items():
+        if value is not None:
+            mask &= (df[column] == value).to_numpy()
+
+    assert index.select(**selections).tolist() == np.flatnonzero(mask).tolist()
+
+
+def test_filter(df, index):
+    filtered = index.filter(df, Fwy=5, Dir="N")
+
+    assert filtered["ID"].tolist() == [1, 5]
+
+
+def test_filter_no_selections_returns_shared_frame(df, index):
+    assert index.filter(df) is df
+    assert index.filter(df, ID=None, Fwy=None, Dir=None, Type=None) is df
+
+
+def test_take(df, index):
+    assert index.take(df, np.arange(len(df))) is df
+    assert index.take(df, np.array([0, 2]))["ID"].tolist() == [1, 3]
+
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize(
+    "selections",
+    [
+        {"Fwy": 5},
+        {"Fwy": 5, "Dir": "N", "Type": "ML"},
+        {},
+    ],
+)
+def test_filter_peak_memory(selections):
+    """Regression benchmark: filtering must not copy the shared frame per session, as df.copy() and chained slices did."""
+    rng = np.random.default_rng(0)
+    size = 20_000
+    df = pd.DataFrame(
+        {
+            "ID": np.arange(size),
+            "Fwy": rng.choice([5, 10, 101, 405, 880], size),
+            "Dir": rng.choice(["N", "S", "E", "W"], size),
+            "Type": rng.choice(["ML", "OR", "FR", "HV"], size),
+            "Latitude": rng.random(size),
+            "Longitude": rng.random(size),
+            "Length": rng.random(size),
+            "Name": [f"Station {i}" for i in range(size)],
+        }
+    )
+    index = StationIndex(df)
+
+    def copy_and_chain():
+        filtered_df = df.copy()
+        for column, value in selections.items():
+            filtered_df = filtered_df[filtered_df[column] == value]
+        return filtered_df
+
+    def single_pass():
+        return index.filter(df, **selections)
+
+    assert single_pass().equals(copy_and_chain())
+    assert _peak_memory(single_pass) < _peak_memory(copy_and_chain) / 2
+
+
+@pytest.mark.parametrize(
+    "small,large,expected",
+    [
+        ([1, 3, 5], [0, 1, 2, 3, 4], [1, 3]),
+        ([7], [0, 1, 2], []),
+        ([], [0, 1, 2], []),
+        ([0, 1], [], []),
+    ],
+)
+def test_intersect(small, large, expected):
+    result = intersect(np.array(small, dtype=np.intp), np.array(large, dtype=np.intp))
+
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("column", ["ID", "Fwy", "Dir", "Type"])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_rank(df, index, column, ascending):
+    ranks = index.rank(df, column, ascending)
+    expected = df[column].sort_values(ascending=ascending, kind="stable", na_position="last")
+
+    assert np.argsort(ranks).tolist() == expected.index.tolist()
+    # ranks are cached
+    assert index.rank(df, column, ascending) is ranks
+
+
+def test_page(df, index):
+    positions = np.arange(len(df))
+
+    assert index.page(df, positions, 0, 4)["ID"].tolist() == [1, 2, 3, 4]
+    assert index.page(df, positions, 1, 4)["ID"].tolist() == [5, 6]
+    assert index.page(df, positions, 2, 4).empty
+
+
+def test_page_sorted(df, index):
+    positions = index.select(Type="ML")
+
+    page = index.page(df, positions, 0, 3, sort_by="Fwy", ascending=False)
+
+    assert page["ID"].tolist() == [4, 2, 6]
+
+
+def test_page_columns(df, index):
+    page = index.page(df, np.arange(len(df)), 0, 2, columns=["ID", "Dir"])
+
+    assert page.columns.tolist() == ["ID", "Dir"]
+    assert page["ID"].tolist() == [1, 2]
@@ -0,0 +1,254 @@
+from datetime import date
+import os
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+import pytest
+
+from streamlit_app.stations import metadata
+
+
+@pytest.mark.parametrize(
+    "filename,expected",
+    [
+        ("d04_text_meta_2025_01_15.txt", (4, date(2025, 1, 15))),
+        ("d12_text_meta_2024_10_30.txt", (12, date(2024, 10, 30))),
+        ("d04_text_meta_2025_01_15.csv", None),
+        ("d4_text_meta_2025_01_15.txt", None),
+        ("app_stations.py", None),
+    ],
+)
+def test_Snapshot_from_path(tmp_path, filename, expected):
+    snapshot = metadata.Snapshot.from_path(tmp_path / filename)
+
+    if expected is None:
+        assert snapshot is None
+    else:
+        assert (snapshot.district, snapshot.date) == expected
+        assert snapshot.path == tmp_path / filename
+
+
+def test_snapshots(data_dir):
+    index = metadata.snapshots(data_dir)
+
+    assert set(index) == {4, 7}
+    assert [s.date for s in index[4]] == [date(2024, 6, 1), date(2025, 1, 15)]
+    assert [s.date for s in index[7]] == [date(2023, 12, 22)]
+
+
+@pytest.mark.parametrize(
+    "as_of,expected",
+    [
+        (None, {(4, date(2025, 1, 15)), (7, date(2023, 12, 22))}),
+        (date(2024, 12, 31), {(4, date(2024, 6, 1)), (7, date(2023, 12, 22))}),
+        (date(2024, 1, 1), {(7, date(2023, 12, 22))}),
+        (date(2023, 1, 1), set()),
+    ],
+)
+def test_select(data_dir, as_of, expected):
+    selected = metadata.select(metadata.snapshots(data_dir), as_of)
+
+    assert {(s.district, s.date) for s in selected} == expected
+
+
+def test_build_creates_artifacts(data_dir, cache_dir):
+    artifacts = metadata.build(data_dir, cache_dir)
+
+    assert len(artifacts) == 2
+    for artifact in artifacts:
+        assert artifact.exists()
+        assert artifact.parent == cache_dir
+        assert artifact.suffix == metadata.ARTIFACT_SUFFIX
+
+
+def test_build_reuses_artifacts(data_dir, cache_dir, mocker):
+    artifacts = metadata.build(data_dir, cache_dir)
+    spy = mocker.spy(metadata, "_compile")
+
+    assert metadata.build(data_dir, cache_dir) == artifacts
+    spy.assert_not_called()
+
+
+def test_build_rebuilds_on_source_change(data_dir, cache_dir):
+    d04, d07 = metadata.build(data_dir, cache_dir)
+
+    source = data_dir / "d07_text_meta_2023_12_22.txt"
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    rebuilt_d04, rebuilt_d07 = metadata.build(data_dir, cache_dir)
+
+    assert rebuilt_d04 == d04
+    assert rebuilt_d07 != d07
+    assert rebuilt_d07.exists()
+    # the stale artifact is cleaned up
+    assert not d07.exists()
+
+
+def test_build_as_of_is_lazy(data_dir, cache_dir):
+    metadata.build(data_dir, cache_dir)
+
+    # the older District 4 snapshot has not been compiled
+    assert not list(cache_dir.glob("d04_text_meta_2024_06_01-*"))
+
+    metadata.build(data_dir, cache_dir, as_of=date(2024, 12, 31))
+
+    assert list(cache_dir.glob("d04_text_meta_2024_06_01-*"))
+    # the newest snapshot's artifact is kept alongside the historical one
+    assert list(cache_dir.glob("d04_text_meta_2025_01_15-*"))
+
+
+def test_build_no_files(tmp_path, cache_dir):
+    with pytest.raises(FileNotFoundError):
+        metadata.build(tmp_path, cache_dir)
+
+
+def test_build_no_files_as_of(data_dir, cache_dir):
+    with pytest.raises(FileNotFoundError, match="as of 2000-01-01"):
+        metadata.build(data_dir, cache_dir, as_of=date(2000, 1, 1))
+
+
+def test_load(data_dir, cache_dir):
+    df = metadata.load(data_dir, cache_dir)
+
+    # only the newest District 4 snapshot is loaded, and the row without coordinates is dropped
+    assert len(df) == 4
+    assert df["ID"].is_unique
+    assert set(df["District"]) == {4, 7}
+    assert df["Latitude"].notna().all()
+
+
+def test_load_schema(data_dir, cache_dir):
+    df = metadata.load(data_dir, cache_dir)
+
+    for column in df:
+        if column in metadata.NUMERIC_CATEGORIES:
+            assert df[column].dtype == "category"
+            assert pd.api.types.is_numeric_dtype(df[column].cat.categories)
+        else:
+            assert df[column].dtype == metadata.SCHEMA[column]
+    # categories are unified across districts
+    assert df["Fwy"].cat.categories.tolist() == [5, 101, 405]
+    assert df["Type"].cat.categories.tolist() == ["HV", "ML"]
+
+
+def test_load_blank_cells(data_dir, cache_dir):
+    path = data_dir / "d07_text_meta_2023_12_22.txt"
+    header, *rows = path.read_text().splitlines()
+    # blank the ID of one station, and the Fwy, County and Lanes of the other
+    rows = [row.split("\t") for row in rows]
+    rows[0][0] = ""
+    for column in ("Fwy", "County", "Lanes"):
+        rows[1][header.split("\t").index(column)] = ""
+    path.write_text("\n".join([header, *("\t".join(row) for row in rows)]) + "\n")
+
+    df = metadata.load(data_dir, cache_dir, district=7)
+
+    assert df["ID"].isna().tolist() == [True, False]
+    for column in ("Fwy", "County", "Lanes"):
+        assert df[column].dtype == "category"
+        assert df[column].isna().tolist() == [False, True]
+
+
+def test_load_as_of(data_dir, cache_dir):
+    df = metadata.load(data_dir, cache_dir, as_of=date(2024, 12, 31))
+
+    assert sorted(df["ID"]) == [400000, 700000, 700001]
+
+
+def test_load_matches_source(data_dir, cache_dir):
+    snapshot = metadata.select(metadata.snapshots(data_dir), district=4)[0]
+    compiled = metadata._compile(snapshot)
+
+    df = metadata.load(data_dir, cache_dir, district=4)
+
+    assert df.equals(compiled)
+
+
+def test_build_rebuilds_on_schema_change(data_dir, cache_dir, mocker):
+    d04, d07 = metadata.build(data_dir, cache_dir)
+
+    mocker.patch.dict(metadata.SCHEMA, {"Lanes": "int16"})
+
+    rebuilt_d04, rebuilt_d07 = metadata.build(data_dir, cache_dir)
+    assert rebuilt_d04 != d04
+    assert rebuilt_d07 != d07
+
+
+def test_memory_report(data_dir, cache_dir):
+    df = metadata.load(data_dir, cache_dir)
+
+    report = metadata.memory_report(df)
+
+    assert report.index.tolist() == [*df.columns, "Total"]
+    assert report.loc["ID", "dtype"] == "Int32"
+    assert report.loc["Total", "bytes"] == df.memory_usage(index=False, deep=True).sum()
+
+
+@pytest.mark.parametrize(
+    "district,as_of,expected",
+    [
+        (4, None, {(4, date(2025, 1, 15))}),
+        (4, date(2024, 12, 31), {(4, date(2024, 6, 1))}),
+        (7, None, {(7, date(2023, 12, 22))}),
+        (5, None, set()),
+    ],
+)
+def test_select_district(data_dir, district, as_of, expected):
+    selected = metadata.select(metadata.snapshots(data_dir), as_of, district)
+
+    assert {(s.district, s.date) for s in selected} == expected
+
+
+def test_build_district(data_dir, cache_dir):
+    artifacts = metadata.build(data_dir, cache_dir, district=7)
+
+    assert len(artifacts) == 1
+    # no other district is compiled
+    assert list(cache_dir.iterdir()) == artifacts
+
+
+def test_build_district_no_files(data_dir, cache_dir):
+    with pytest.raises(FileNotFoundError, match="for district 5"):
+        metadata.build(data_dir, cache_dir, district=5)
+
+
+def test_load_district(data_dir, cache_dir, mocker):
+    spy = mocker.spy(metadata, "_read_meta_file")
+
+    df = metadata.load(data_dir, cache_dir, district=7)
+
+    assert set(df["District"]) == {7}
+    assert sorted(df["ID"]) == [700000, 700001]
+    spy.assert_called_once_with(data_dir / "d07_text_meta_2023_12_22.txt")
+
+
+def test_resolve_same_snapshots_between_dates(data_dir):
+    # any date between two snapshots resolves to the same selection, so caches keyed on it are shared
+    assert metadata.resolve(data_dir, as_of=date(2024, 7, 1)) == metadata.resolve(data_dir, as_of=date(2024, 12, 31))
+    assert metadata.resolve(data_dir) != metadata.resolve(data_dir, as_of=date(2024, 12, 31))
+
+
+def test_resolve_no_files(data_dir):
+    with pytest.raises(FileNotFoundError, match="for district 12"):
+        metadata.resolve(data_dir, district=12)
+
+
+def test_load_snapshots(data_dir, cache_dir):
+    selected = metadata.resolve(data_dir, district=7)
+
+    df = metadata.load_snapshots(selected, cache_dir)
+
+    assert sorted(df["ID"]) == [700000, 700001]
+
+
+def test_build_artifacts_map_without_copying(data_dir, cache_dir):
+    artifacts = metadata.build(data_dir, cache_dir)
+    allocated = pa.total_allocated_bytes()
+
+    tables = [feather.read_table(artifact, memory_map=True) for artifact in artifacts]
+
+    # uncompressed buffers are read straight from the mapped file, rather than decompressed into allocated memory
+    assert pa.total_allocated_bytes() == allocated
+    assert sum(table.num_rows for table in tables) == 4
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit_app.stations.spatial import SpatialIndex, haversine_km
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"Latitude": rng.uniform(32.5, 42, 5_000), "Longitude": rng.uniform(-124.4, -114.1, 5_000)})
+
+
+@pytest.fixture
+def spatial(df):
+    return SpatialIndex(df)
+
+
+def test_haversine_km():
+    # Los Angeles to San Francisco
+    assert haversine_km(34.0522, -118.2437, 37.7749, -122.4194) == pytest.approx(559, rel=0.01)
+    assert haversine_km(34, -118, 34, -118) == 0
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [
+        (34, -119, 35, -118),
+        (32, -125, 43, -114),
+        (36.5, -120.1, 36.6, -120.0),
+        (40, -118, 39, -117),
+        (10, -80, 11, -79),
+    ],
+)
+def test_bbox_matches_scan(df, spatial, bbox):
+    south, west, north, east = bbox
+    lat, lon = df["Latitude"], df["Longitude"]
+    expected = np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+
+    assert spatial.bbox(*bbox).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("point", [(34.05, -118.24), (37.77, -122.42), (41.9, -124.3), (20.0, -100.0)])
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest_matches_scan(df, spatial, point, k):
+    distances = haversine_km(*point, df["Latitude"].to_numpy(), df["Longitude"].to_numpy())
+    expected = np.argsort(distances, kind="stable")[:k]
+
+    positions, found_distances = spatial.nearest(*point, k)
+
+    assert positions.tolist() == expected.tolist()
+    assert found_distances.tolist() == pytest.approx(distances[expected].tolist())
+    assert np.all(np.diff(found_distances) >= 0)
+
+
+def test_nearest_more_than_available(df, spatial):
+    positions, _ = spatial.nearest(34, -118, len(df) + 10)
+
+    assert sorted(positions.tolist()) == list(range(len(df)))
+
+
+def test_empty():
+    spatial = SpatialIndex(pd.DataFrame({"Latitude": [], "Longitude": []}))
+
+    assert len(spatial.bbox(30, -120, 40, -110)) == 0
+    positions, distances = spatial.nearest(34, -118, 3)
+    assert len(positions) == len(distances) == 0
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit_app.stations.thinning import ThinningIndex
+
+
+@pytest.fixture
+def df():
+    """Two straight freeways of 1,000 stations each."""
+    steps = np.linspace(0, 1, 1_000)
+    return pd.DataFrame(
+        {
+            "Fwy": [5] * 1_000 + [10] * 1_000,
+            "Latitude": np.concatenate([34 + steps, np.full(1_000, 34.5)]),
+            "Longitude": np.concatenate([np.full(1_000, -118.5), -119 + steps]),
+        }
+    )
+
+
+@pytest.fixture
+def thinning(df):
+    return ThinningIndex(df)
+
+
+def test_cells(df, thinning):
+    assert len(thinning.cell_y) == len(thinning.cell_x) == len(df)
+    assert thinning.cell_y.min() == thinning.cell_x.min() == 0
+    assert thinning.cell_y.max() == thinning.cell_x.max() == 2**thinning.levels - 1
+
+
+def test_thin_under_cap(df, thinning):
+    positions = np.arange(len(df))
+
+    assert thinning.thin(positions, len(df)) is positions
+
+
+@pytest.mark.parametrize("max_points", [2, 10, 100, 500])
+def test_thin_caps_points(df, thinning, max_points):
+    thinned = thinning.thin(np.arange(len(df)), max_points)
+
+    assert 0 < len(thinned) <= max_points
+
+
+def test_thin_keeps_freeway_shape(df, thinning):
+    thinned = thinning.thin(np.arange(len(df)), 100)
+    stations = df.iloc[thinned]
+
+    for fwy, points in stations.groupby("Fwy"):
+        freeway = df[df["Fwy"] == fwy]
+        # both freeways are represented, spread along their full length
+        assert len(points) > 10
+        for column in ("Latitude", "Longitude"):
+            assert points[column].max() - points[column].min() >= 0.9 * (freeway[column].max() - freeway[column].min())
+
+
+def test_thin_subset(df, thinning):
+    positions = np.flatnonzero(df["Fwy"] == 10)
+
+    thinned = thinning.thin(positions, 50)
+
+    assert 0 < len(thinned) <= 50
+    assert set(thinned) <= set(positions)
+
+
+def test_thin_below_coarsest_level(df, thinning):
+    # fewer points than freeways: fall back to one per freeway
+    thinned = thinning.thin(np.arange(len(df)), 1)
+
+    assert len(thinned) == 2
+
+
+def test_empty():
+    thinning = ThinningIndex(pd.DataFrame({"Fwy": [], "Latitude": [], "Longitude": []}))
+
+    assert len(thinning.thin(np.arange(0), 10)) == 0
+
+
+def cells(df, positions, level):
+    """The (Fwy, cell) pairs covered by the rows at positions, on a 2^level x 2^level grid over df's extent."""
+    rows = df.iloc[positions]
+    y = ((rows["Latitude"] - df["Latitude"].min()) / np.ptp(df["Latitude"]) * 2**level).astype(int).clip(upper=2**level - 1)
+    x = ((rows["Longitude"] - df["Longitude"].min()) / np.ptp(df["Longitude"]) * 2**level).astype(int).clip(upper=2**level - 1)
+    return set(zip(rows["Fwy"], y, x))
+
+
+def test_thin_filtered_keeps_freeway_cells(df, thinning):
+    # alternate directions, so the first station of every cell over the whole frame is northbound
+    direction = np.where(np.arange(len(df)) % 2 == 0, "N", "S")
+    positions = np.flatnonzero(direction == "S")
+
+    thinned = thinning.thin(positions, 100)
+
+    assert 0 < len(thinned) <= 100
+    assert set(thinned) <= set(positions)
+    # every freeway cell of the filtered stations is still covered, at the finest level the cap allows (2 x 32 cells)
+    for level in range(6):
+        assert cells(df, thinned, level) == cells(df, positions, level)
@@ -1,6 +1,6 @@
 import json
 
-from pems.settings import set_aws_db_credentials
+from pems.settings import db_pool_options, set_aws_db_credentials
 import os
 
 
@@ -51,3 +51,36 @@ def test_set_aws_db_credentials_missing_keys(monkeypatch):
     assert os.environ.get("POSTGRES_DB") is None
     assert os.environ.get("POSTGRES_USER") is None
     assert os.environ.get("POSTGRES_PASSWORD") is None
+
+
+def test_db_pool_options_default(monkeypatch):
+    for name in ("DJANGO_DB_POOL", "DJANGO_DB_POOL_MIN_SIZE", "DJANGO_DB_POOL_MAX_SIZE", "DJANGO_DB_POOL_TIMEOUT"):
+        monkeypatch.delenv(name, raising=False)
+
+    options = db_pool_options()
+
+    assert options["min_size"] == 1
+    assert options["max_size"] == 4
+    assert options["timeout"] == 10
+
+
+def test_db_pool_options_environment(monkeypatch):
+    monkeypatch.setenv("DJANGO_DB_POOL_MIN_SIZE", "2")
+    monkeypatch.setenv("DJANGO_DB_POOL_MAX_SIZE", "8")
+    monkeypatch.setenv("DJANGO_DB_POOL_TIMEOUT", "2.5")
+    monkeypatch.setenv("DJANGO_DB_POOL_MAX_IDLE", "60")
+    monkeypatch.setenv("DJANGO_DB_POOL_MAX_LIFETIME", "120")
+
+    options = db_pool_options()
+
+    assert options["min_size"] == 2
+    assert options["max_size"] == 8
+    assert options["timeout"] == 2.5
+    assert options["max_idle"] == 60
+    assert options["max_lifetime"] == 120
+
+
+def test_db_pool_options_disabled(monkeypatch):
+    monkeypatch.setenv("DJANGO_DB_POOL", "false")
+
+    assert db_pool_options() is False